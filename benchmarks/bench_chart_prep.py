@@ -0,0 +1,134 @@
+"""Time the dashboard's chart-prep steps: Python loops vs vectorized pandas/NumPy.
+
+"Loop" is how the dashboards used to prepare the Top Topics bar and the
+feedback pie: extending a Python list with every interaction's topics, and
+labelling each feedback score with Series.apply and a lambda. The
+vectorized variants are explode + value_counts on the list column,
+analytics_queries.count_topics on the loader's exploded topic table (what
+the dashboard uses) and np.where on the scores. The dashboard's feedback
+pie now comes from the rollups, so the scores variant only shows what
+vectorizing the old path would have gained. Each variant's output is
+checked against the loop's before timing.
+
+Usage:
+    python benchmarks/bench_chart_prep.py [--sizes 10000 100000 1000000] [--repeat 3] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from analytics_loader import INTERACTION_DTYPES, to_frame  # noqa: E402
+from analytics_queries import count_topics, rating_frame  # noqa: E402
+from analytics_rollups import POSITIVE_FEEDBACK_THRESHOLD  # noqa: E402
+from synthetic import SyntheticAnalytics  # noqa: E402
+
+
+def loop_topics(topics):
+    """Top Topics prep as the dashboards used to do it"""
+    all_topics = []
+    for topics_list in topics:
+        if topics_list:
+            all_topics.extend(topics_list)
+    counts = pd.Series(all_topics).value_counts().reset_index()
+    counts.columns = ['topic', 'count']
+    return counts
+
+
+def loop_ratings(scores):
+    """Feedback pie prep as the dashboards used to do it"""
+    ratings = scores.dropna().apply(lambda x: "👍 Positive" if x > 3 else "👎 Negative")
+    counts = ratings.value_counts().reset_index()
+    counts.columns = ['rating', 'count']
+    return counts
+
+
+def explode_topics(topics):
+    """Top Topics prep with explode + value_counts on the list column"""
+    counts = topics.explode().dropna().value_counts().reset_index()
+    counts.columns = ['topic', 'count']
+    return counts
+
+
+def where_ratings(scores):
+    """Feedback pie prep with np.where over the scores, ignoring missing ones"""
+    scores = scores.dropna().to_numpy()
+    ratings = np.where(scores > POSITIVE_FEEDBACK_THRESHOLD, "positive", "negative")
+    positive = int(np.count_nonzero(ratings == "positive"))
+    return rating_frame(positive, len(ratings) - positive)
+
+
+def as_counts(df, key):
+    """A {label: count} dict, for comparing outputs regardless of row order"""
+    return {str(label): int(count) for label, count in zip(df[key], df['count'])}
+
+
+def best_of(func, repeat):
+    """Fastest of `repeat` calls, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def run(size, repeat):
+    """Time every variant on `size` synthetic interactions"""
+    _, interactions, _ = SyntheticAnalytics(seed=size).generate(size)
+    # Chart prep never reads the free text; dropping it lets two 1M-row frames fit in memory
+    for interaction in interactions:
+        interaction["query"] = interaction["response"] = None
+    raw = pd.DataFrame(interactions)
+    frame, exploded = to_frame(interactions, INTERACTION_DTYPES)
+    topics_table = exploded["topics"].rename(columns={"value": "topic"})
+    scores = frame['feedback_score']
+
+    variants = {
+        "topics_loop": lambda: loop_topics(raw['topics']),
+        "topics_explode": lambda: explode_topics(raw['topics']),
+        "topics_table": lambda: count_topics(topics_table, frame.index),
+        "feedback_apply": lambda: loop_ratings(raw['feedback_score']),
+        "feedback_where": lambda: where_ratings(scores),
+    }
+
+    # Same answers before comparing speed
+    expected_topics = as_counts(loop_topics(raw['topics']), 'topic')
+    assert as_counts(explode_topics(raw['topics']), 'topic') == expected_topics
+    assert as_counts(count_topics(topics_table, frame.index), 'topic') == expected_topics
+    assert as_counts(where_ratings(scores), 'rating') == as_counts(loop_ratings(raw['feedback_score']), 'rating')
+
+    return {name: best_of(func, repeat) for name, func in variants.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        timings = run(size, args.repeat)
+        results[size] = timings
+        print(f"\n{size:,} interactions (best of {args.repeat}, ms)")
+        print(f"  topics    loop {timings['topics_loop']:9.1f}   explode {timings['topics_explode']:9.1f}"
+              f"   table {timings['topics_table']:9.1f}"
+              f"   ({timings['topics_loop'] / timings['topics_table']:.0f}x)")
+        print(f"  feedback  apply {timings['feedback_apply']:8.1f}   where {timings['feedback_where']:11.1f}"
+              f"   ({timings['feedback_apply'] / timings['feedback_where']:.0f}x)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Analytics dashboard load time, memory and payload size as the data grows.
+
+For each size, a synthetic dataset with that many interactions is written to
+a temporary directory (synthetic.py's write_dataset). A fresh Python process
+then runs the dashboard page there with Streamlit's AppTest and measures:
+
+- cold: the first run, including imports, file parsing and every query
+- rerun: a rerun with nothing changed
+- filter: a rerun after moving the Start Date to the last 30 days
+- the bytes of every message the page sends to the browser, per run
+- the process's peak RSS
+
+Each size gets its own process so that caches and memory peaks from one
+size don't leak into the next.
+
+Usage:
+    python benchmarks/bench_dashboard.py [--sizes 1000 10000 100000] [--script src/pages/1_Analytics_Dashboard.py]
+        [--output results.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_PATH = os.path.join(BENCHMARKS_DIR, "..", "src", "pages", "1_Analytics_Dashboard.py")
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+
+# Days kept by the filter change
+FILTER_DAYS = 30
+
+
+def measure(script, data_root):
+    """Run the dashboard in data_root and return its timings, bytes sent and peak RSS"""
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    # Count the serialized size of every message on its way to the browser
+    sent = [0]
+    enqueue = ForwardMsgQueue.enqueue
+
+    def counting_enqueue(self, msg):
+        sent[0] += msg.ByteSize()
+        return enqueue(self, msg)
+
+    ForwardMsgQueue.enqueue = counting_enqueue
+
+    def timed_run(action):
+        sent[0] = 0
+        start = time.perf_counter()
+        action()
+        elapsed = (time.perf_counter() - start) * 1000
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return elapsed, sent[0]
+
+    os.chdir(data_root)
+    at = AppTest.from_file(os.path.abspath(script), default_timeout=600)
+    at.session_state["password_correct"] = True
+    results = {}
+    results["cold_ms"], results["cold_bytes"] = timed_run(at.run)
+    results["rerun_ms"], results["rerun_bytes"] = timed_run(at.run)
+
+    end_date = at.sidebar.date_input[1].value
+    start_input = at.sidebar.date_input[0].set_value(end_date - datetime.timedelta(days=FILTER_DAYS))
+    results["filter_ms"], results["filter_bytes"] = timed_run(start_input.run)
+
+    # ru_maxrss is in kilobytes on Linux
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+
+def data_bytes(data_dir):
+    """Total size of the files in an analytics data directory"""
+    return sum(entry.stat().st_size for entry in os.scandir(data_dir) if entry.is_file())
+
+
+def run_worker(script, data_root):
+    """Measure the dashboard on data_root/analytics_data in a new process"""
+    worker = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", data_root, "--script", script],
+        capture_output=True, text=True,
+    )
+    if worker.returncode:
+        raise RuntimeError(f"Dashboard run in {data_root} failed:\n{worker.stderr[-2000:]}")
+    return json.loads(worker.stdout.splitlines()[-1])
+
+
+def run_size(script, size):
+    """Write a dataset of `size` interactions and measure the dashboard on it in a new process"""
+    from synthetic import write_dataset
+
+    with tempfile.TemporaryDirectory() as data_root:
+        data_dir = os.path.join(data_root, "analytics_data")
+        write_dataset(data_dir, size, seed=size)
+        return {"size": size, "data_mb": data_bytes(data_dir) / 1e6, **run_worker(script, data_root)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--script", default=SCRIPT_PATH, help="Dashboard page to run")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--worker", metavar="DATA_ROOT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.script, args.worker)))
+        return
+
+    results = []
+    print(f"{'interactions':>12} {'data MB':>8} {'cold ms':>9} {'rerun ms':>9} {'filter ms':>9} "
+          f"{'cold KB':>9} {'filter KB':>9} {'peak RSS MB':>11}")
+    for size in args.sizes:
+        row = run_size(args.script, size)
+        results.append(row)
+        print(f"{size:12,} {row['data_mb']:8.1f} {row['cold_ms']:9.0f} {row['rerun_ms']:9.0f} "
+              f"{row['filter_ms']:9.0f} {row['cold_bytes'] / 1024:9.0f} {row['filter_bytes'] / 1024:9.0f} "
+              f"{row['peak_rss_mb']:11.0f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"created": datetime.datetime.now().isoformat(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
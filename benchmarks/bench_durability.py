@@ -0,0 +1,265 @@
+"""Write throughput against durability for each analytics fsync policy.
+
+For each SCHOOLBOT_WAL_FSYNC policy (see src/analytics_wal.py), a fresh
+Python process runs JSONAnalytics session cycles (start_session,
+track_interaction, track_feedback, end_session) against a copy of a
+synthetic dataset, once from one thread and once from --threads threads.
+Calls are timed and os.fsync calls are counted, so the report shows what
+each policy costs per write and how many writes share one fsync.
+
+Then each policy gets a crash test, repeated --crashes times: a writer
+process is killed with SIGKILL at a random moment while --threads threads
+write and report each interaction id as soon as track_interaction returns.
+Recovery then runs as it would on the next start, and every acknowledged
+interaction must be in interactions.json, which must parse. A killed
+process keeps everything it handed to the OS, so this holds for every
+policy; what each policy risks in a power cut is listed as "power-cut
+window" instead, since that can't be tested from here.
+
+Usage:
+    python benchmarks/bench_durability.py [--policies always group interval none] [--size 10000]
+        [--threads 8] [--cycles 200] [--crashes 3] [--output results.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from analytics_wal import FSYNC_MS, FSYNC_POLICIES, WAL_FILE  # noqa: E402
+
+OPERATIONS = ("start_session", "track_interaction", "track_feedback", "end_session")
+
+QUERY = "Why was Dunbar High School considered a model of educational excellence?"
+RESPONSE = "Dunbar High School was known for its rigorous academics. " * 40
+
+
+def power_cut_window(policy):
+    """What a power cut can lose under a policy, as a description"""
+    if policy in ("always", "group"):
+        return "nothing acknowledged"
+    if policy == "interval":
+        return f"up to {FSYNC_MS:g} ms of writes"
+    try:
+        with open("/proc/sys/vm/dirty_expire_centisecs") as f:
+            return f"up to ~{int(f.read()) / 100:g} s of writes (kernel writeback)"
+    except OSError:
+        return "whatever the OS hasn't written back"
+
+
+def untimed(operation, call, *args):
+    """Stand-in for a timing wrapper that only makes the call"""
+    return call(*args)
+
+
+def cycle(analytics, timed):
+    """One session cycle through the analytics API"""
+    timed("start_session", analytics.start_session)
+    interaction_id = timed("track_interaction", analytics.track_interaction, QUERY, RESPONSE)
+    timed("track_feedback", analytics.track_feedback, interaction_id, 5)
+    timed("end_session", analytics.end_session)
+    return interaction_id
+
+
+def measure(data_dir, threads, cycles):
+    """Run `cycles` session cycles from `threads` threads; returns timings and the fsyncs made"""
+    from analytics import JSONAnalytics
+
+    fsyncs = [0]
+    fsync = os.fsync
+
+    def counting_fsync(fd):
+        fsyncs[0] += 1
+        return fsync(fd)
+
+    os.fsync = counting_fsync
+    timings = {operation: [] for operation in OPERATIONS}
+
+    def timed(operation, call, *args):
+        start = time.perf_counter()
+        result = call(*args)
+        timings[operation].append((time.perf_counter() - start) * 1000)
+        return result
+
+    def worker(count):
+        analytics = JSONAnalytics(data_dir)
+        for _ in range(count):
+            cycle(analytics, timed)
+
+    # Recovery and TextBlob's lazy loading happen before the clock starts
+    cycle(JSONAnalytics(data_dir), untimed)
+    fsyncs[0] = 0
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(cycles // threads,)) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    writes = sum(len(values) for values in timings.values())
+    return {
+        "threads": threads,
+        "seconds": seconds,
+        "writes": writes,
+        "writes_per_sec": writes / seconds,
+        "fsyncs": fsyncs[0],
+        "writes_per_fsync": writes / fsyncs[0] if fsyncs[0] else None,
+        "operations": {
+            operation: {
+                "p50_ms": float(np.percentile(values, 50)),
+                "p99_ms": float(np.percentile(values, 99)),
+            }
+            for operation, values in timings.items() if values
+        },
+    }
+
+
+def write_until_killed(data_dir, threads):
+    """Write session cycles from `threads` threads forever, printing each acknowledged interaction id"""
+    from analytics import JSONAnalytics
+
+    lock = threading.Lock()
+
+    def worker():
+        analytics = JSONAnalytics(data_dir)
+        while True:
+            interaction_id = cycle(analytics, untimed)
+            with lock:
+                sys.stdout.write(interaction_id + "\n")
+                sys.stdout.flush()
+
+    cycle(JSONAnalytics(data_dir), untimed)
+    print("ready", flush=True)
+    for _ in range(threads):
+        threading.Thread(target=worker, daemon=True).start()
+    threading.Event().wait()
+
+
+def worker_command(policy, *args):
+    """Environment and command line for a worker process using `policy`"""
+    env = dict(os.environ, SCHOOLBOT_WAL_FSYNC=policy)
+    return env, [sys.executable, os.path.abspath(__file__), *args]
+
+
+def run_throughput(policy, dataset, threads, cycles):
+    """Throughput results for one policy and thread count, from a fresh process and data copy"""
+    with tempfile.TemporaryDirectory() as root:
+        data_dir = os.path.join(root, "analytics_data")
+        shutil.copytree(dataset, data_dir)
+        env, command = worker_command(policy, "--worker", data_dir, "--threads", str(threads),
+                                      "--cycles", str(cycles))
+        worker = subprocess.run(command, env=env, capture_output=True, text=True)
+    if worker.returncode:
+        raise RuntimeError(f"{policy} worker failed:\n{worker.stderr[-2000:]}")
+    return json.loads(worker.stdout.splitlines()[-1])
+
+
+def run_crash(policy, dataset, threads, rng):
+    """Kill a writer at a random moment, recover, and count acknowledged interactions that are missing"""
+    from analytics_wal import recover
+
+    with tempfile.TemporaryDirectory() as root:
+        data_dir = os.path.join(root, "analytics_data")
+        shutil.copytree(dataset, data_dir)
+        env, command = worker_command(policy, "--crash-worker", data_dir, "--threads", str(threads))
+        writer = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        if writer.stdout.readline().strip() != "ready":
+            raise RuntimeError(f"{policy} crash writer failed to start")
+
+        acknowledged = []
+        reader = threading.Thread(target=lambda: acknowledged.extend(line.strip() for line in writer.stdout))
+        reader.start()
+        time.sleep(rng.uniform(0.5, 3))
+        writer.send_signal(signal.SIGKILL)
+        writer.wait()
+        reader.join()
+        # A line cut off by the kill is not an acknowledged id
+        acknowledged = [interaction_id for interaction_id in acknowledged if len(interaction_id) == 36]
+
+        wal_bytes = os.path.getsize(os.path.join(data_dir, WAL_FILE))
+        start = time.perf_counter()
+        recovery = recover(data_dir)
+        recovery_ms = (time.perf_counter() - start) * 1000
+        try:
+            with open(os.path.join(data_dir, "interactions.json")) as f:
+                stored = {record["interaction_id"] for record in json.load(f)}
+            lost = sum(1 for interaction_id in acknowledged if interaction_id not in stored)
+        except ValueError:
+            lost = None
+    return {
+        "acknowledged": len(acknowledged),
+        "lost": lost,
+        "wal_bytes": wal_bytes,
+        "replayed": recovery["replayed"],
+        "recovery_ms": recovery_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--policies", nargs="+", choices=FSYNC_POLICIES, default=list(FSYNC_POLICIES))
+    parser.add_argument("--size", type=int, default=10_000, help="Interactions in the starting dataset")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--cycles", type=int, default=200, help="Session cycles per throughput run")
+    parser.add_argument("--crashes", type=int, default=3, help="Crash tests per policy")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--worker", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    parser.add_argument("--crash-worker", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker or args.crash_worker:
+        # Tracking outside `streamlit run` warns about session state on every call
+        import streamlit.logger
+        streamlit.logger.set_log_level("error")
+        if args.crash_worker:
+            write_until_killed(args.crash_worker, args.threads)
+        print(json.dumps(measure(args.worker, args.threads, args.cycles)))
+        return
+
+    from synthetic import write_dataset
+
+    rng = random.Random(0)
+    results = []
+    with tempfile.TemporaryDirectory() as dataset:
+        write_dataset(dataset, args.size, seed=args.size)
+        print(f"{'policy':<9} {'threads':>7} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'writes/fsync':>12}  power-cut window")
+        for policy in args.policies:
+            row = {"policy": policy, "power_cut_window": power_cut_window(policy), "runs": []}
+            for threads in (1, args.threads):
+                run = run_throughput(policy, dataset, threads, args.cycles)
+                row["runs"].append(run)
+                interaction = run["operations"]["track_interaction"]
+                per_fsync = f"{run['writes_per_fsync']:.1f}" if run["writes_per_fsync"] else "-"
+                print(f"{policy:<9} {threads:>7} {run['writes_per_sec']:9.0f} {interaction['p50_ms']:8.2f} "
+                      f"{interaction['p99_ms']:8.2f} {per_fsync:>12}  {row['power_cut_window']}")
+            row["crashes"] = [run_crash(policy, dataset, args.threads, rng) for _ in range(args.crashes)]
+            results.append(row)
+
+        print(f"\n{'policy':<9} {'crash':>5} {'acked':>7} {'lost':>5} {'WAL KB':>7} {'replayed':>8} {'recovery ms':>11}")
+        for row in results:
+            for number, crash in enumerate(row["crashes"], 1):
+                lost = "corrupt" if crash["lost"] is None else crash["lost"]
+                print(f"{row['policy']:<9} {number:>5} {crash['acknowledged']:>7} {lost:>5} "
+                      f"{crash['wal_bytes'] / 1024:7.0f} {crash['replayed']:>8} {crash['recovery_ms']:11.0f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"created": datetime.datetime.now().isoformat(), "args": vars(args), "results": results},
+                      f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Server CPU and websocket bytes of a chat turn and a feedback click, full rerun versus fragment rerun.
+
+The chat form, history and feedback buttons are fragments, so a submit or
+a click reruns only them (src/views/chat.py). This starts the app as
+bench_sessions.py does, with the mock LLM, and has one simulated student
+ask --turns questions and rate each answer. A second student does the same
+with every submit and click sent as a full-app rerun, which is how the chat
+page worked before it used fragments. For each step and mode it reports:
+
+- server CPU milliseconds, from /proc, so the mock LLM's wait doesn't count
+- bytes the server sent over the websocket
+- wall time
+
+After every run, full or fragment, Streamlit does a full gc.collect()
+(runner.postScriptGC). With the app's imports loaded that costs about as
+much CPU as a small rerun itself and hides the difference;
+--no-post-script-gc turns it off in the server to show the reruns alone.
+
+Linux only. Needs the websockets package.
+
+Usage:
+    python benchmarks/bench_fragments.py [--turns 20] [--latency-ms 50] [--no-post-script-gc]
+        [--output results.json]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import time
+
+import websockets
+
+from bench_sessions import APP_PATH, Server, Student, process_usage
+
+STEPS = ("chat_submit", "feedback_click")
+MODES = ("full", "fragment")
+
+QUESTION = "Why was Dunbar High School considered a model of educational excellence in {year}?"
+
+
+async def run_mode(server, turns, fragment):
+    """Ask `turns` questions and rate each answer; returns per-step CPU ms, bytes and wall ms"""
+    samples = {step: [] for step in STEPS}
+
+    async with websockets.connect(server.url, subprotocols=["streamlit"], max_size=None) as websocket:
+        student = Student(websocket)
+        await student.rerun()
+        await student.open_page("Chat with SchoolBot")
+
+        async def measured(step, action, *args):
+            cpu = process_usage(server.process.pid)[0]
+            received = student.bytes_received
+            start = time.perf_counter()
+            await action(*args, fragment=fragment)
+            samples[step].append({
+                "wall_ms": (time.perf_counter() - start) * 1000,
+                "cpu_ms": (process_usage(server.process.pid)[0] - cpu) * 1000,
+                "bytes": student.bytes_received - received,
+            })
+
+        for turn in range(turns):
+            await measured("chat_submit", student.ask, QUESTION.format(year=1900 + turn))
+            await measured("feedback_click", student.click, "Yes")
+
+    # CPU time is counted in clock ticks, so only the mean over many steps is meaningful
+    return {
+        step: {
+            "cpu_ms": statistics.mean(sample["cpu_ms"] for sample in values),
+            "bytes": statistics.mean(sample["bytes"] for sample in values),
+            "wall_p50_ms": statistics.median(sample["wall_ms"] for sample in values),
+        }
+        for step, values in samples.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20, help="Questions asked in each mode")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean mock LLM delay")
+    parser.add_argument("--no-post-script-gc", action="store_true",
+                        help="Turn off Streamlit's gc.collect() after every run")
+    parser.add_argument("--app", default=APP_PATH)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.no_post_script_gc:
+        os.environ["STREAMLIT_RUNNER_POST_SCRIPT_GC"] = "false"
+    server = Server(args.app, args.latency_ms)
+    try:
+        # One pass first so page modules and TextBlob are loaded before anything is measured
+        asyncio.run(run_mode(server, 1, fragment=True))
+        results = {mode: asyncio.run(run_mode(server, args.turns, fragment=mode == "fragment")) for mode in MODES}
+    finally:
+        server.stop()
+
+    print(f"{'step':<15} {'mode':<9} {'CPU ms':>7} {'KB sent':>8} {'p50 ms':>7}")
+    for step in STEPS:
+        for mode in MODES:
+            row = results[mode][step]
+            print(f"{step:<15} {mode:<9} {row['cpu_ms']:7.1f} {row['bytes'] / 1024:8.1f} {row['wall_p50_ms']:7.1f}")
+        full, fragment = results["full"][step], results["fragment"][step]
+        print(f"{'':<15} {'saved':<9} {1 - fragment['cpu_ms'] / full['cpu_ms']:7.0%} "
+              f"{1 - fragment['bytes'] / full['bytes']:8.0%}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"created": datetime.datetime.now().isoformat(), "args": vars(args), "results": results},
+                      f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""In-memory size of the analytics DataFrames, before and after compact dtypes.
+
+"Before" is how the dashboards used to build their frames: pd.DataFrame over
+the raw records plus pd.to_datetime, leaving ids, query types and device
+info as strings and topics as Python lists. "After" is analytics_loader's
+compact representation: categoricals for repeated strings, narrow numeric
+types, datetime64 timestamps and topics as an exploded categorical table.
+
+Interactions are compared as they are stored in each layout: with the
+response text inline before, and with the `response_hash` of a copy in the
+response pack (analytics_blobs) after. The pack stays on disk, so its size
+is reported separately and not counted as memory.
+
+Usage:
+    python benchmarks/bench_memory.py [--interactions 1000000] [--response-pool 500] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from analytics_blobs import BlobStore, externalize  # noqa: E402
+from analytics_loader import INTERACTION_DTYPES, SESSION_DTYPES, to_frame  # noqa: E402
+from synthetic import SyntheticAnalytics  # noqa: E402
+
+
+# Free-text columns, kept as plain strings in both layouts
+TEXT_COLUMNS = ("query",)
+
+# Columns the compact layout stores in place of a legacy one, added to the legacy column's row
+STORED_COLUMNS = {"response_hash": "response"}
+
+
+def frame_bytes(df):
+    """Deep memory usage of a DataFrame, per column and in total"""
+    usage = df.memory_usage(deep=True, index=False)
+    return {column: int(size) for column, size in usage.items()}, int(usage.sum())
+
+
+def legacy_frame(records, time_column):
+    """A frame built the way the dashboards used to build it"""
+    df = pd.DataFrame(records)
+    df[time_column] = pd.to_datetime(df[time_column], format="ISO8601")
+    return df
+
+
+def report(name, records, dtypes, time_column, stored_records=None):
+    """Compare legacy and compact frames for one kind of record.
+
+    `stored_records` are the records as the compact layout stores them, if
+    that differs from the legacy records.
+    """
+    before_columns, before = frame_bytes(legacy_frame(records, time_column))
+    frame, exploded = to_frame(stored_records or records, dtypes)
+    after_columns, after = frame_bytes(frame)
+    for stored, legacy in STORED_COLUMNS.items():
+        if stored in after_columns:
+            after_columns[legacy] = after_columns.get(legacy, 0) + after_columns.pop(stored)
+    for column, table in exploded.items():
+        _, size = frame_bytes(table)
+        after_columns[column] = size
+        after += size
+
+    print(f"\n{name}: {len(records):,} records")
+    print(f"  {'column':<20} {'before MB':>10} {'after MB':>10}")
+    for column in before_columns:
+        print(f"  {column:<20} {before_columns[column] / 1e6:10.1f} "
+              f"{after_columns.get(column, 0) / 1e6:10.1f}")
+    print(f"  {'total':<20} {before / 1e6:10.1f} {after / 1e6:10.1f}"
+          f"   ({before / after:.1f}x smaller)")
+
+    # Free text is stored the same way in both; show the gain on everything else
+    text = sum(before_columns.get(column, 0) for column in TEXT_COLUMNS)
+    if text:
+        print(f"  {'total without text':<20} {(before - text) / 1e6:10.1f} "
+              f"{(after - text) / 1e6:10.1f}   ({(before - text) / (after - text):.1f}x smaller)")
+    return {"records": len(records), "before_bytes": before, "after_bytes": after,
+            "before_columns": before_columns, "after_columns": after_columns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interactions", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--response-pool", type=int, default=500, help="Distinct responses in the synthetic data")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    generator = SyntheticAnalytics(seed=args.seed, response_pool=args.response_pool)
+    sessions, interactions, _ = generator.generate(args.interactions)
+    with tempfile.TemporaryDirectory() as data_dir:
+        responses = BlobStore(data_dir)
+        stored = [externalize(record, responses) for record in interactions]
+        pack_bytes = os.path.getsize(responses.path)
+
+    results = {
+        "sessions": report("sessions", sessions, SESSION_DTYPES, "start_time"),
+        "interactions": report("interactions", interactions, INTERACTION_DTYPES, "timestamp", stored),
+    }
+    distinct = len({record["response_hash"] for record in stored})
+    results["interactions"].update(pack_bytes=pack_bytes, distinct_responses=distinct)
+    print(f"  response pack on disk: {pack_bytes / 1e6:.1f} MB for {distinct:,} distinct responses")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
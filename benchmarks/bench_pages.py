@@ -0,0 +1,73 @@
+"""Per-page rerun time for the main SchoolBot app.
+
+Runs src/app.py headlessly with Streamlit's AppTest, switches to each page
+and times repeated reruns of it. Analytics files are written to a temporary
+directory and a dummy OpenAI key is used, so nothing leaves the machine.
+
+Usage:
+    python benchmarks/bench_pages.py [--reruns 20] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+APP_PATH = os.path.join(SRC_DIR, "app.py")
+sys.path.insert(0, SRC_DIR)
+
+from analytics_wal import close_log  # noqa: E402
+PAGES = ["Home", "Chat with SchoolBot", "School Locations", "About", "Sources"]
+
+
+def time_page(at, page, reruns):
+    """Switch to a page and return rerun times in milliseconds"""
+    at.sidebar.radio[0].set_value(page).run()
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    if at.exception:
+        raise RuntimeError(f"{page} raised: {at.exception[0].message}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    app_path = os.path.abspath(APP_PATH)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        at = AppTest.from_file(app_path, default_timeout=60).run()
+        for page in PAGES:
+            timings = time_page(at, page, args.reruns)
+            results[page] = {
+                "median_ms": statistics.median(timings),
+                "mean_ms": statistics.mean(timings),
+                "max_ms": max(timings),
+            }
+            print(f"{page:<22} median {results[page]['median_ms']:7.1f} ms   "
+                  f"max {results[page]['max_ms']:7.1f} ms")
+        # End the chat page's analytics session and checkpoint its log before the directory goes
+        if "analytics" in at.session_state:
+            at.session_state["analytics"].end_session()
+        close_log("analytics_data")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
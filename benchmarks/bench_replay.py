@@ -0,0 +1,200 @@
+"""Replay logged conversations through the chat app and compare builds.
+
+Reads interactions.json, groups the interactions into conversations by
+session_id and replays each one as a student would. The student opens the
+chat page, asks the logged questions in timestamp order, and gives the
+logged feedback after a rated answer. The app under test is a real
+`streamlit run` of --app, driven over websockets as in bench_sessions.py,
+so every turn goes through the whole chat pipeline: session memory,
+prompt assembly, the API call and analytics.
+
+Time compression: with --speed N, conversations start and turns follow
+each other at N times the logged pace (e.g. 60 replays an hour in a
+minute). The default of 0 ignores the timestamps and runs up to
+--concurrency conversations at once, back to back.
+
+The API is mock_llm.py by default. --backend openai uses the real API from
+OPENAI_API_KEY (and OPENAI_BASE_URL, if set), which costs money.
+
+Reports turn latency, token counts and the prompt-cache hit rate. Token
+counts and cache hits are read from the interactions the replayed build
+recorded. Save a run with --output and compare a later build against it
+with --baseline:
+
+    python benchmarks/bench_replay.py --source analytics_data/interactions.json --output before.json
+    python benchmarks/bench_replay.py --source analytics_data/interactions.json --baseline before.json
+    python benchmarks/bench_replay.py --app ../other-checkout/src/app.py --baseline before.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from analytics_export import in_date_range, iter_records  # noqa: E402
+from analytics_rollups import POSITIVE_FEEDBACK_THRESHOLD  # noqa: E402
+from bench_sessions import APP_PATH, Server, StepFailed, Student  # noqa: E402
+
+# Figures compared against a baseline
+COMPARED = ("turn_p50_ms", "turn_p95_ms", "turn_mean_ms", "errors", "prompt_tokens_per_turn",
+            "completion_tokens", "cache_hit_rate")
+
+
+def load_conversations(path, start_date=None, end_date=None, limit=None):
+    """Logged conversations as (start time, [(time, query, feedback score)...]), oldest first"""
+    sessions = {}
+    for record in iter_records(path):
+        if not record.get("query") or not in_date_range(record.get("timestamp"), start_date, end_date):
+            continue
+        timestamp = datetime.datetime.fromisoformat(record["timestamp"])
+        sessions.setdefault(record["session_id"], []).append(
+            (timestamp, record["query"], record.get("feedback_score"))
+        )
+    conversations = sorted((min(turns)[0], sorted(turns)) for turns in sessions.values())
+    return conversations[:limit] if limit else conversations
+
+
+async def replay_conversation(url, turns, speed):
+    """Replay one conversation; returns turn latencies in ms and the errors of failed steps"""
+    latencies = []
+    errors = []
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as websocket:
+        student = Student(websocket)
+
+        async def step(action, *args):
+            start = time.perf_counter()
+            try:
+                await action(*args)
+            except StepFailed as e:
+                errors.append(str(e))
+                return None
+            return (time.perf_counter() - start) * 1000
+
+        await step(student.rerun)
+        await step(student.open_page, "Chat with SchoolBot")
+        previous = turns[0][0]
+        for timestamp, query, feedback_score in turns:
+            if speed:
+                await asyncio.sleep((timestamp - previous).total_seconds() / speed)
+            previous = timestamp
+            latencies.append(await step(student.ask, query))
+            if feedback_score is not None:
+                await step(student.click, "Yes" if feedback_score > POSITIVE_FEEDBACK_THRESHOLD else "Not really")
+    return latencies, errors
+
+
+async def replay(server, conversations, speed, concurrency):
+    """Replay all conversations against a running server; returns per-conversation results"""
+    limit = asyncio.Semaphore(concurrency)
+    first = conversations[0][0]
+
+    async def run(start, turns):
+        if speed:
+            await asyncio.sleep((start - first).total_seconds() / speed)
+        async with limit:
+            return await replay_conversation(server.url, turns, speed)
+
+    return await asyncio.gather(*(run(start, turns) for start, turns in conversations))
+
+
+def summarize(results, records, seconds):
+    """Latency, error, token and cache figures of one replay"""
+    latencies = [latency for turns, _ in results for latency in turns if latency is not None]
+    errors = [error for _, turn_errors in results for error in turn_errors]
+    records = records or []
+    prompt = sum(record.get("prompt_tokens") or 0 for record in records)
+    cached = sum(record.get("cached_tokens") or 0 for record in records)
+    p50, p95, p99 = (float(value) for value in np.percentile(latencies, [50, 95, 99])) if latencies else (None,) * 3
+    return {
+        "conversations": len(results),
+        "turns": len(latencies),
+        "seconds": seconds,
+        "errors": len(errors),
+        "turn_p50_ms": p50,
+        "turn_p95_ms": p95,
+        "turn_p99_ms": p99,
+        "turn_mean_ms": float(np.mean(latencies)) if latencies else None,
+        "recorded_turns": len(records),
+        "prompt_tokens": prompt,
+        "completion_tokens": sum(record.get("completion_tokens") or 0 for record in records),
+        "prompt_tokens_per_turn": prompt / len(records) if records else None,
+        "cached_tokens": cached,
+        # Share of prompt tokens served from the provider's prompt cache
+        "cache_hit_rate": cached / prompt if prompt else None,
+        "cached_turns": sum(1 for record in records if record.get("cached_tokens")),
+    }
+
+
+def compare(summary, baseline):
+    """Print this replay's figures next to a baseline's"""
+    def show(value):
+        return "-" if value is None else f"{value:.6g}"
+
+    print(f"\n{'':<24} {'baseline':>12} {'this build':>12} {'change':>8}")
+    for key in COMPARED:
+        old, new = baseline.get(key), summary.get(key)
+        change = f"{new / old - 1:+.1%}" if old and new is not None else ""
+        print(f"{key:<24} {show(old):>12} {show(new):>12} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=os.path.join("analytics_data", "interactions.json"),
+                        help="interactions.json to replay")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="First day to replay (YYYY-MM-DD)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="Last day to replay (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, help="Replay only the first N conversations")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="Replay at N times the logged pace; 0 ignores timestamps")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Conversations replayed at once (--speed 0 only)")
+    parser.add_argument("--app", default=APP_PATH, help="Build to replay against")
+    parser.add_argument("--backend", choices=("mock", "openai"), default="mock")
+    parser.add_argument("--latency-ms", type=float, default=800, help="Mean mock LLM delay")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.source, args.start, args.end, args.limit)
+    if not conversations:
+        sys.exit(f"No conversations with queries in {args.source}")
+    print(f"Replaying {len(conversations):,} conversations, "
+          f"{sum(len(turns) for _, turns in conversations):,} turns, against {args.app}")
+
+    server = Server(args.app, args.latency_ms, mock=args.backend == "mock")
+    try:
+        start = time.perf_counter()
+        results = asyncio.run(replay(server, conversations, args.speed,
+                                     args.concurrency if not args.speed else len(conversations)))
+        seconds = time.perf_counter() - start
+        summary = summarize(results, server.interaction_records(), seconds)
+    finally:
+        server.stop()
+
+    print(f"{summary['turns']:,} turns in {seconds:.1f} s, {summary['errors']} errors; "
+          f"p50 {summary['turn_p50_ms'] or 0:.0f} ms, p95 {summary['turn_p95_ms'] or 0:.0f} ms; "
+          f"{summary['prompt_tokens_per_turn'] or 0:.0f} prompt tokens per turn, "
+          f"cache hit rate {summary['cache_hit_rate'] or 0:.1%}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            compare(summary, json.load(f)["summary"])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "created": datetime.datetime.now().isoformat(),
+                "args": {key: str(value) for key, value in vars(args).items()},
+                "summary": summary,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Storage size and dashboard load with responses inline versus in the blob store.
+
+For each size, a synthetic dataset is written the old way, with every
+response inline in interactions.json, and the dashboard is measured on it
+(bench_dashboard.py's worker: cold run, rerun, filter change, peak RSS).
+Then the data directory is recovered as on the app's first start, which
+moves the responses into responses.pack (src/analytics_blobs.py), and the
+dashboard is measured again. Also reported:
+
+- data bytes before and after, and how many distinct responses there are
+- how long the one-time move took
+- how long the Raw Data explorer takes to show a page of PAGE_ROWS
+  responses, which are now read from the pack for just those rows
+
+The synthetic generator reuses --response-pool answers, standing in for
+cached and canned replies. Pass a pool as large as the size to see what
+compression alone saves.
+
+Usage:
+    python benchmarks/bench_responses.py [--sizes 10000 100000] [--response-pool 500]
+        [--output results.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import analytics_blobs  # noqa: E402
+import analytics_queries as queries  # noqa: E402
+from analytics_loader import load_frames  # noqa: E402
+from analytics_wal import recover  # noqa: E402
+from bench_dashboard import SCRIPT_PATH, data_bytes, run_worker  # noqa: E402
+from synthetic import write_dataset  # noqa: E402
+
+# Rows per Raw Data page when timing response reads, the explorer's largest page
+PAGE_ROWS = queries.MAX_PAGE_SIZE
+
+
+def page_read_ms(data_dir):
+    """Milliseconds to fill the response column of the last Raw Data page, with a cold store index"""
+    _, interactions, _ = load_frames(data_dir)
+    last_page = max(1, -(-len(interactions) // PAGE_ROWS))
+    # Drop the store the move left indexed, as a restarted app would start without one
+    analytics_blobs._stores.pop(os.path.abspath(data_dir), None)
+    start = time.perf_counter()
+    rows = queries.page_slice(interactions, ["interaction_id", "response"], last_page, PAGE_ROWS, data_dir)
+    elapsed = (time.perf_counter() - start) * 1000
+    if rows["response"].isna().any():
+        raise RuntimeError("Some responses could not be read from the blob store")
+    return elapsed
+
+
+def run_size(script, size, response_pool):
+    """Measure one dataset with inline responses, move them to the blob store and measure again"""
+    with tempfile.TemporaryDirectory() as data_root:
+        data_dir = os.path.join(data_root, "analytics_data")
+        write_dataset(data_dir, size, seed=size, response_pool=response_pool, inline_responses=True)
+        row = {"size": size, "inline_mb": data_bytes(data_dir) / 1e6, "inline": run_worker(script, data_root)}
+
+        start = time.perf_counter()
+        recover(data_dir)
+        row["move_seconds"] = time.perf_counter() - start
+        row["stored_mb"] = data_bytes(data_dir) / 1e6
+        _, interactions, _ = load_frames(data_dir)
+        row["distinct_responses"] = int(interactions["response_hash"].nunique())
+        row["stored"] = run_worker(script, data_root)
+        row["page_read_ms"] = page_read_ms(data_dir)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--response-pool", type=int, default=500, help="Distinct responses in the synthetic data")
+    parser.add_argument("--script", default=SCRIPT_PATH, help="Dashboard page to run")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'interactions':>12} {'distinct':>8} {'inline MB':>9} {'stored MB':>9} {'saved':>6} "
+          f"{'move s':>6} {'cold ms':>15} {'filter ms':>15} {'peak RSS MB':>13} {'page ms':>7}")
+    for size in args.sizes:
+        row = run_size(args.script, size, args.response_pool)
+        results.append(row)
+        inline, stored = row["inline"], row["stored"]
+        print(f"{size:12,} {row['distinct_responses']:8,} {row['inline_mb']:9.1f} {row['stored_mb']:9.1f} "
+              f"{1 - row['stored_mb'] / row['inline_mb']:6.0%} {row['move_seconds']:6.1f} "
+              f"{inline['cold_ms']:7.0f}>{stored['cold_ms']:<7.0f} "
+              f"{inline['filter_ms']:7.0f}>{stored['filter_ms']:<7.0f} "
+              f"{inline['peak_rss_mb']:6.0f}>{stored['peak_rss_mb']:<6.0f} {row['page_read_ms']:7.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"created": datetime.datetime.now().isoformat(), "args": vars(args), "results": results},
+                      f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""How many simultaneous students one SchoolBot process can serve.
+
+Starts `streamlit run src/app.py` as on a single Railway instance, with the
+OpenAI API replaced by mock_llm.py, and drives it with simulated students.
+Each student is a websocket client speaking Streamlit's browser protocol.
+Each student:
+1. lands on Home
+2. opens the chat page
+3. asks --turns questions
+4. rates the last answer
+5. opens the School Locations map
+
+Form submits and feedback clicks rerun only their fragment, as in a browser.
+
+Every concurrency level gets a fresh server and data directory and reports:
+- sessions per second and turn latency percentiles
+- failed steps, meaning Python exceptions or st.error messages on the page
+- server CPU seconds per session and RSS growth per concurrent student
+- analytics write contention: write time from the server's metrics
+  endpoint (the analytics_write stage) and interactions missing from
+  interactions.json afterwards
+
+With --search, concurrency doubles until a level misses the --slo-ms p95
+turn latency or the --max-error-rate. The last passing and first failing
+levels are then bisected to find the breaking point.
+
+Linux only (server CPU and memory come from /proc). Needs the websockets
+package.
+
+Usage:
+    python benchmarks/bench_sessions.py [--concurrency 1 4 16] [--turns 3] [--latency-ms 800]
+    python benchmarks/bench_sessions.py --search [--slo-ms 5000] [--max-concurrency 256]
+        [--output results.json]
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+import mock_llm
+from synthetic import QUERY_TEMPLATES, SCHOOLS, YEARS
+from analytics_wal import CHECKPOINT_FILE, WAL_FILE
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "app.py")
+
+# Seconds between server CPU/RSS samples, and to wait for the server to start
+SAMPLE_INTERVAL = 0.2
+STARTUP_TIMEOUT = 60
+
+# Alert format of st.error
+ALERT_ERROR = 1
+
+
+class StepFailed(Exception):
+    """A rerun showed an exception or an st.error"""
+
+
+class Student:
+    """
+    One browser tab: a websocket session that reruns the app with widget
+    values, the way Streamlit's frontend does.
+
+    Widgets are remembered by label from the elements the server sends;
+    the page radio's value is sent with every rerun so the page sticks.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.widgets = {}
+        self.page = None
+        self.bytes_received = 0
+
+    def widget(self, label, kind=None):
+        """(id, fragment id) of the latest widget whose label contains `label`"""
+        for widget_label, (widget_id, fragment_id, widget_kind) in reversed(list(self.widgets.items())):
+            if label in widget_label and kind in (None, widget_kind):
+                return widget_id, fragment_id
+        raise StepFailed(f"No {kind or 'widget'} labelled {label!r} on the page")
+
+    async def rerun(self, states=(), fragment_id=""):
+        """Send a rerun and wait for it to finish; raises StepFailed if the page shows an error"""
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.fragment_id = fragment_id
+        if self.page:
+            page_id, _ = self.widget("", "radio")
+            message.rerun_script.widget_states.widgets.append(WidgetState(id=page_id, string_value=self.page))
+        message.rerun_script.widget_states.widgets.extend(states)
+        await self.websocket.send(message.SerializeToString())
+
+        failure = None
+        while True:
+            data = await self.websocket.recv()
+            self.bytes_received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                break
+            if kind != "delta" or forward.delta.WhichOneof("type") != "new_element":
+                continue
+
+            element = forward.delta.new_element
+            element_type = element.WhichOneof("type")
+            if element_type == "exception":
+                failure = failure or element.exception.message
+            elif element_type == "alert" and element.alert.format == ALERT_ERROR:
+                failure = failure or element.alert.body
+            else:
+                widget = getattr(element, element_type)
+                if getattr(widget, "id", "") and hasattr(widget, "label"):
+                    # Re-insert so the newest widget with a label is found first
+                    self.widgets.pop(widget.label, None)
+                    self.widgets[widget.label] = (widget.id, forward.delta.fragment_id, element_type)
+        if failure:
+            raise StepFailed(failure)
+
+    async def open_page(self, page):
+        """Pick a page in the sidebar"""
+        self.page = page
+        await self.rerun()
+
+    async def ask(self, question, fragment=True):
+        """Type a question and press Send Message; with fragment=False the whole app reruns"""
+        text_id, _ = self.widget("What would you like to know")
+        button_id, fragment_id = self.widget("Send Message")
+        await self.rerun([WidgetState(id=text_id, string_value=question),
+                          WidgetState(id=button_id, trigger_value=True)], fragment_id if fragment else "")
+
+    async def click(self, label, fragment=True):
+        """Click a button; with fragment=False the whole app reruns"""
+        button_id, fragment_id = self.widget(label)
+        await self.rerun([WidgetState(id=button_id, trigger_value=True)], fragment_id if fragment else "")
+
+
+async def visit(url, turns, think_seconds, seed):
+    """One student's visit; returns turn timings in ms, the failed steps' errors and bytes received"""
+    rng = random.Random(seed)
+    turn_ms = []
+    errors = []
+
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as websocket:
+        student = Student(websocket)
+
+        async def step(action, *args):
+            await asyncio.sleep(think_seconds)
+            start = time.perf_counter()
+            try:
+                await action(*args)
+            except StepFailed as e:
+                errors.append(str(e))
+                return None
+            return (time.perf_counter() - start) * 1000
+
+        await step(student.rerun)
+        await step(student.open_page, "Chat with SchoolBot")
+        for _ in range(turns):
+            _, templates = rng.choice(QUERY_TEMPLATES)
+            question = rng.choice(templates).format(school=rng.choice(SCHOOLS), year=rng.choice(YEARS))
+            elapsed = await step(student.ask, question)
+            if elapsed is not None:
+                turn_ms.append(elapsed)
+        await step(student.click, "Yes")
+        await step(student.open_page, "School Locations")
+    return turn_ms, errors, student.bytes_received
+
+
+def free_port():
+    """An unused local TCP port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_usage(pid):
+    """(CPU seconds, RSS MB) of a process, from /proc"""
+    with open(f"/proc/{pid}/stat") as f:
+        # Fields after the command name, which may contain spaces
+        fields = f.read().rsplit(")", 1)[1].split()
+    with open(f"/proc/{pid}/statm") as f:
+        rss_pages = int(f.read().split()[1])
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return cpu, rss_pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def parse_histogram(text, name, **labels):
+    """{"buckets": {bound: count}, "count", "sum"} of one histogram in Prometheus text, or None"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    buckets = {}
+    count = total = None
+    for line in text.splitlines():
+        match = re.match(rf'{name}_(bucket|count|sum)\{{{label_text}(?:,le="([^"]+)")?\}} (\S+)', line)
+        if not match:
+            continue
+        part, bound, value = match.groups()
+        if part == "bucket":
+            buckets[float(bound)] = float(value)
+        elif part == "count":
+            count = float(value)
+        else:
+            total = float(value)
+    if not count:
+        return None
+    return {"buckets": buckets, "count": count, "sum": total}
+
+
+def bucket_quantile(histogram, q):
+    """Upper bound of the histogram bucket holding the q-quantile, in ms"""
+    if not histogram:
+        return None
+    for bound, count in sorted(histogram["buckets"].items()):
+        if count >= q * histogram["count"]:
+            return bound * 1000
+    return None
+
+
+class Server:
+    """
+    A `streamlit run` of the app in its own data directory, answered by a
+    mock LLM, or with mock=False by whatever OPENAI_API_KEY and
+    OPENAI_BASE_URL in the environment point at.
+    """
+
+    def __init__(self, app_path, latency_ms=800, mock=True):
+        self.port = free_port()
+        self.metrics_port = free_port()
+        self.data_root = tempfile.mkdtemp()
+        env = dict(os.environ, SCHOOLBOT_METRICS_PORT=str(self.metrics_port))
+        self.mock = None
+        if mock:
+            self.mock, base_url, _ = mock_llm.start(latency_ms=latency_ms)
+            env.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="sk-benchmark")
+        self.log = open(os.path.join(self.data_root, "server.log"), 'w')
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", os.path.abspath(app_path),
+             "--server.port", str(self.port), "--server.headless", "true",
+             "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+            cwd=self.data_root, env=env, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+        self.url = f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1)
+                break
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("Streamlit server did not start")
+                time.sleep(0.2)
+
+    def metrics(self):
+        """The app's metrics in Prometheus text format"""
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.metrics_port}/metrics", timeout=5) as response:
+            return response.read().decode("utf-8")
+
+    def settle(self, timeout=30):
+        """Wait until the app has checkpointed every analytics write it logged; returns whether it did"""
+        data_dir = os.path.join(self.data_root, "analytics_data")
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if not os.path.exists(os.path.join(data_dir, CHECKPOINT_FILE)):
+                    wal_path = os.path.join(data_dir, WAL_FILE)
+                    if not os.path.exists(wal_path) or not os.path.getsize(wal_path):
+                        return True
+            except FileNotFoundError:
+                # Caught between the rename and reopen of a checkpoint
+                pass
+            time.sleep(0.1)
+        return False
+
+    def interaction_records(self):
+        """The records in interactions.json once checkpointed, or None if it does not parse"""
+        self.settle()
+        try:
+            with open(os.path.join(self.data_root, "analytics_data", "interactions.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def interactions(self):
+        """Records in interactions.json, or None if it does not parse"""
+        records = self.interaction_records()
+        return None if records is None else len(records)
+
+    def stop(self):
+        """Stop the server and mock LLM and remove the data directory"""
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        if self.mock:
+            self.mock.shutdown()
+        self.log.close()
+        shutil.rmtree(self.data_root, ignore_errors=True)
+
+
+async def run_level(args, concurrency):
+    """Run `concurrency` students at once against a fresh server; returns the level's results"""
+    server = Server(args.app, args.latency_ms)
+    try:
+        # One visit first so page modules are imported before the baseline
+        await visit(server.url, 1, 0, seed=-1)
+        warm_interactions = server.interactions() or 0
+        cpu_start, rss_start = process_usage(server.process.pid)
+        peak_rss = rss_start
+
+        async def sample():
+            nonlocal peak_rss
+            while True:
+                await asyncio.sleep(SAMPLE_INTERVAL)
+                peak_rss = max(peak_rss, process_usage(server.process.pid)[1])
+
+        async def student(position):
+            results = []
+            for repeat in range(args.sessions_per_student):
+                results.append(await visit(server.url, args.turns, args.think_ms / 1000,
+                                           seed=position * args.sessions_per_student + repeat))
+            return results
+
+        sampler = asyncio.create_task(sample())
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(student(position) for position in range(concurrency)))
+        seconds = time.perf_counter() - start
+        sampler.cancel()
+        cpu_seconds = process_usage(server.process.pid)[0] - cpu_start
+
+        visits = [visit_result for results in outcomes for visit_result in results]
+        turn_ms = [elapsed for turns, _, _ in visits for elapsed in turns]
+        errors = collections.Counter(error[:200] for _, visit_errors, _ in visits for error in visit_errors)
+        writes = parse_histogram(server.metrics(), "schoolbot_chat_stage_seconds", stage="analytics_write")
+        interactions = server.interactions()
+    finally:
+        server.stop()
+
+    p50, p95, p99 = (float(value) for value in np.percentile(turn_ms, [50, 95, 99])) if turn_ms else (None,) * 3
+    return {
+        "concurrency": concurrency,
+        "sessions": len(visits),
+        "seconds": seconds,
+        "sessions_per_sec": len(visits) / seconds,
+        "turns": len(turn_ms),
+        "turn_p50_ms": p50,
+        "turn_p95_ms": p95,
+        "turn_p99_ms": p99,
+        "errors": sum(errors.values()),
+        "error_rate": sum(errors.values()) / (len(visits) * (args.turns + 4)),
+        "common_errors": dict(errors.most_common(5)),
+        "kb_received_per_session": sum(received for _, _, received in visits) / len(visits) / 1024,
+        "cpu_seconds_per_session": cpu_seconds / len(visits),
+        "peak_rss_mb": peak_rss,
+        "rss_mb_per_student": (peak_rss - rss_start) / concurrency,
+        "analytics_writes": writes["count"] if writes else 0,
+        "analytics_write_mean_ms": writes["sum"] / writes["count"] * 1000 if writes else None,
+        "analytics_write_p95_ms": bucket_quantile(writes, 0.95),
+        # Every successful turn saves one interaction
+        "lost_interactions": None if interactions is None
+        else max(0, len(turn_ms) - (interactions - warm_interactions)),
+    }
+
+
+def report(row):
+    """Print one level's results as a table row"""
+    lost = "corrupt" if row["lost_interactions"] is None else row["lost_interactions"]
+    print(f"{row['concurrency']:6d} {row['sessions_per_sec']:8.2f} {row['turn_p50_ms'] or 0:8.0f} "
+          f"{row['turn_p95_ms'] or 0:8.0f} {row['error_rate']:7.1%} {row['cpu_seconds_per_session']:7.2f} "
+          f"{row['rss_mb_per_student']:8.1f} {row['analytics_write_mean_ms'] or 0:9.1f} {lost:>7}", flush=True)
+
+
+def passes(row, args):
+    """Whether a level met the latency objective and error budget"""
+    return row["turn_p95_ms"] is not None and row["turn_p95_ms"] <= args.slo_ms \
+        and row["error_rate"] <= args.max_error_rate
+
+
+def search(args, results):
+    """Double concurrency until a level fails, then bisect; returns the highest passing level"""
+    def measure(concurrency):
+        row = asyncio.run(run_level(args, concurrency))
+        results.append(row)
+        report(row)
+        return passes(row, args)
+
+    good, bad = 0, None
+    concurrency = 1
+    while concurrency <= args.max_concurrency:
+        if not measure(concurrency):
+            bad = concurrency
+            break
+        good = concurrency
+        concurrency *= 2
+    if bad is None:
+        return good
+
+    while bad - good > 1:
+        middle = (good + bad) // 2
+        if measure(middle):
+            good = middle
+        else:
+            bad = middle
+    return good
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Simultaneous students per level")
+    parser.add_argument("--turns", type=int, default=3, help="Questions per visit")
+    parser.add_argument("--sessions-per-student", type=int, default=1, help="Visits made by each student")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pause before each step")
+    parser.add_argument("--latency-ms", type=float, default=800, help="Mean mock LLM delay")
+    parser.add_argument("--app", default=APP_PATH)
+    parser.add_argument("--search", action="store_true", help="Find the breaking point")
+    parser.add_argument("--slo-ms", type=float, default=5000, help="p95 turn latency a level must meet")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    print(f"{'users':>6} {'sess/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7} {'CPU s':>7} "
+          f"{'MB/user':>8} {'write ms':>9} {'lost':>7}")
+    results = []
+    breaking_point = None
+    if args.search:
+        breaking_point = search(args, results)
+        print(f"\nHighest concurrency within p95 {args.slo_ms:.0f} ms and "
+              f"{args.max_error_rate:.0%} errors: {breaking_point}")
+    else:
+        for concurrency in args.concurrency:
+            row = asyncio.run(run_level(args, concurrency))
+            results.append(row)
+            report(row)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "created": datetime.datetime.now().isoformat(),
+                "args": vars(args),
+                "breaking_point": breaking_point,
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Latency and throughput of the analytics storage calls at several data sizes.
+
+For each backend and dataset size, a synthetic history of that many
+interactions is written to a temporary data directory (synthetic.py's
+write_dataset). Then full session cycles are run against it: start_session,
+track_interaction with a realistic query and answer, track_feedback on that
+answer and end_session. Each call is timed separately.
+
+Cycles run once single-threaded and then from --threads threads at the
+same time, each thread using its own backend instance, the way concurrent
+Streamlit sessions do. Failed calls are counted. After the concurrent run
+the data files are checked for records that were written but later lost.
+
+Each phase stops after --cycles cycles or --max-seconds seconds, whichever
+comes first, so large sizes stay bounded. Results go to stdout and, with
+--output, to a JSON file. --baseline compares against an earlier results
+file.
+
+Usage:
+    python benchmarks/bench_storage.py [--sizes 1000 100000 1000000] [--threads 8]
+        [--cycles 50] [--max-seconds 60] [--output results.json] [--baseline old.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import streamlit.logger  # noqa: E402
+from analytics import JSONAnalytics  # noqa: E402
+from analytics_wal import checkpoint_all, close_log  # noqa: E402
+from synthetic import QUERY_TEMPLATES, SCHOOLS, YEARS, make_response, write_dataset  # noqa: E402
+
+# name -> class taking a data directory, with the JSONAnalytics tracking methods
+BACKENDS = {
+    "json": JSONAnalytics,
+}
+OPERATIONS = ("start_session", "track_interaction", "track_feedback", "end_session")
+
+# Token counts passed to track_interaction, as the API reports them
+USAGE = {"prompt_tokens": 1500, "completion_tokens": 400, "total_tokens": 1900, "cached_tokens": 0}
+
+
+def run_cycles(backend, data_dir, cycles, deadline, seed):
+    """Run session cycles on a fresh backend; returns {operation: [ms...]} and the error count"""
+    rng = random.Random(seed)
+    analytics = backend(data_dir)
+    timings = {operation: [] for operation in OPERATIONS}
+    errors = 0
+
+    def timed(operation, *args, **kwargs):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            result = getattr(analytics, operation)(*args, **kwargs)
+        except Exception:
+            errors += 1
+            return None
+        timings[operation].append((time.perf_counter() - start) * 1000)
+        return result
+
+    for cycle in range(cycles):
+        if cycle and time.perf_counter() > deadline:
+            break
+        _, templates = rng.choice(QUERY_TEMPLATES)
+        query = rng.choice(templates).format(school=rng.choice(SCHOOLS), year=rng.choice(YEARS))
+        timed("start_session")
+        interaction_id = timed("track_interaction", query, make_response(rng),
+                               model="gpt-3.5-turbo-0125", usage=USAGE)
+        if interaction_id:
+            timed("track_feedback", interaction_id, rng.choice((1, 5)))
+        timed("end_session")
+    return timings, errors
+
+
+def summary(timings, seconds):
+    """Latency statistics in ms and throughput for one operation"""
+    if not timings:
+        return {"ops": 0}
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {
+        "ops": len(timings),
+        "mean_ms": float(np.mean(timings)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": max(timings),
+        "ops_per_sec": len(timings) / seconds if seconds else None,
+    }
+
+
+def record_counts(data_dir):
+    """Records in each data file, or None if the file no longer parses"""
+    counts = {}
+    for name in ("sessions.json", "interactions.json", "feedback.json"):
+        try:
+            with open(os.path.join(data_dir, name), 'r') as f:
+                counts[name] = len(json.load(f))
+        except ValueError:
+            counts[name] = None
+    return counts
+
+
+def run_phase(backend, data_dir, threads, cycles, max_seconds):
+    """Run `cycles` session cycles spread over `threads` threads; returns the phase's results"""
+    before = record_counts(data_dir)
+    deadline = time.perf_counter() + max_seconds
+    outcomes = [None] * threads
+    share = [cycles // threads + (1 if position < cycles % threads else 0) for position in range(threads)]
+
+    def worker(position):
+        outcomes[position] = run_cycles(backend, data_dir, share[position], deadline, seed=position)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(position,)) for position in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    timings = {operation: [] for operation in OPERATIONS}
+    for thread_timings, _ in outcomes:
+        for operation, values in thread_timings.items():
+            timings[operation].extend(values)
+    # Logged writes reach the data files at the next checkpoint
+    checkpoint_all()
+    after = record_counts(data_dir)
+
+    # Every successful start_session adds a session, and so on
+    expected = {
+        "sessions.json": len(timings["start_session"]),
+        "interactions.json": len(timings["track_interaction"]),
+        "feedback.json": len(timings["track_feedback"]),
+    }
+    lost = {
+        name: None if before[name] is None or after[name] is None
+        else max(0, before[name] + expected[name] - after[name])
+        for name in expected
+    }
+    return {
+        "threads": threads,
+        "seconds": seconds,
+        "errors": sum(errors for _, errors in outcomes),
+        "lost_records": lost,
+        "operations": {operation: summary(values, seconds) for operation, values in timings.items()},
+    }
+
+
+def compare(results, baseline):
+    """Print p50 latency against a baseline results file"""
+    previous = {
+        (row["backend"], row["size"], row["threads"], operation): stats.get("p50_ms")
+        for row in baseline["results"]
+        for operation, stats in row["operations"].items()
+    }
+    print("\nCompared with baseline (p50, new / old)")
+    for row in results:
+        for operation, stats in row["operations"].items():
+            old = previous.get((row["backend"], row["size"], row["threads"], operation))
+            if old and stats.get("p50_ms"):
+                print(f"  {row['backend']:<6} {row['size']:>9,} x{row['threads']:<3} {operation:<18} "
+                      f"{stats['p50_ms'] / old:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--cycles", type=int, default=50, help="Session cycles per phase")
+    parser.add_argument("--max-seconds", type=float, default=60, help="Time limit per phase")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    # Tracking outside `streamlit run` warns about session state on every call
+    streamlit.logger.set_log_level("error")
+
+    results = []
+    for backend_name in args.backends:
+        for size in args.sizes:
+            with tempfile.TemporaryDirectory() as data_dir:
+                write_dataset(data_dir, size, seed=size)
+                for threads in (1, args.threads):
+                    row = {"backend": backend_name, "size": size,
+                           **run_phase(BACKENDS[backend_name], data_dir, threads, args.cycles, args.max_seconds)}
+                    results.append(row)
+
+                    print(f"\n{backend_name}, {size:,} interactions, {threads} thread(s): "
+                          f"{row['errors']} errors, lost {row['lost_records']}")
+                    print(f"  {'operation':<18} {'ops':>5} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'ops/s':>8}")
+                    for operation, stats in row["operations"].items():
+                        if stats["ops"]:
+                            print(f"  {operation:<18} {stats['ops']:5d} {stats['p50_ms']:9.1f} "
+                                  f"{stats['p95_ms']:9.1f} {stats['max_ms']:9.1f} {stats['ops_per_sec']:8.1f}")
+                close_log(data_dir)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            compare(results, json.load(f))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "created": datetime.datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
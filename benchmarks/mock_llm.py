@@ -0,0 +1,144 @@
+"""A local stand-in for the OpenAI chat completions API.
+
+Answers POST /v1/chat/completions with a SchoolBot-length answer after a
+lognormally distributed delay, and reports token usage the way the real
+API does. That includes cached_tokens: like OpenAI's prompt caching, a
+prompt whose leading messages were already seen in an earlier request (and
+come to at least CACHE_MIN_TOKENS) is reported as cached, in steps of
+CACHE_STEP_TOKENS.
+
+Point the app at it with OPENAI_BASE_URL, or run it on its own:
+
+    python benchmarks/mock_llm.py --port 8765 --latency-ms 800
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-mock streamlit run src/app.py
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import TOKENS_PER_WORD, make_response
+
+# Prompt caching rules, as documented for the OpenAI API
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+
+
+def count_tokens(text):
+    """Rough token count of a text, using the same ratio as the synthetic data"""
+    return int(len(text.split()) * TOKENS_PER_WORD) + 4
+
+
+class MockLLM:
+    """
+    Shared state of one mock server: the delay distribution, canned answers
+    and the prompt prefixes seen so far.
+    """
+
+    def __init__(self, latency_ms=800, sigma=0.4, seed=0, responses=200):
+        """Set up the delay distribution and a pool of canned answers"""
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.rng = random.Random(seed)
+        self.responses = [make_response(self.rng) for _ in range(responses)]
+        self.prefixes = set()
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def cached_tokens(self, messages):
+        """Tokens of the longest already-seen message prefix, as prompt caching would report"""
+        digest = hashlib.blake2b(digest_size=16)
+        tokens = cached = 0
+        with self.lock:
+            for message in messages:
+                digest.update(json.dumps(message, sort_keys=True).encode("utf-8"))
+                tokens += count_tokens(message.get("content") or "")
+                key = digest.copy().digest()
+                if key in self.prefixes:
+                    cached = tokens
+                else:
+                    self.prefixes.add(key)
+        if cached < CACHE_MIN_TOKENS:
+            return 0
+        return cached // CACHE_STEP_TOKENS * CACHE_STEP_TOKENS
+
+    def complete(self, request):
+        """A chat.completion response body for a request body"""
+        messages = request.get("messages", [])
+        with self.lock:
+            self.requests += 1
+            answer = self.rng.choice(self.responses)
+            # Lognormal with the configured mean
+            delay = self.rng.lognormvariate(math.log(self.latency_ms) - self.sigma ** 2 / 2, self.sigma)
+        time.sleep(delay / 1000)
+
+        prompt_tokens = sum(count_tokens(message.get("content") or "") for message in messages)
+        completion_tokens = count_tokens(answer)
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-3.5-turbo") + "-mock",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": answer},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": self.cached_tokens(messages)},
+            },
+        }
+
+
+def handler_for(llm):
+    """A request handler class answering with `llm`"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            body = json.dumps(llm.complete(request)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start(port=0, host="127.0.0.1", **options):
+    """Serve a MockLLM in a background thread; returns (server, base_url, llm)"""
+    llm = MockLLM(**options)
+    server = ThreadingHTTPServer((host, port), handler_for(llm))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-llm", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1", llm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=800, help="Mean response delay")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), handler_for(MockLLM(args.latency_ms)))
+    print(f"Mock LLM at http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
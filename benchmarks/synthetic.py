@@ -0,0 +1,255 @@
+"""Synthetic analytics data shaped like what JSONAnalytics writes.
+
+Sessions, interactions and feedback are generated together so ids line up:
+each session belongs to a user (some users return), holds a handful of
+chat turns spread over a few minutes, and some answers get feedback.
+Query text, query types and topics follow the same rules as the app, and
+responses are a few hundred words long like real SchoolBot answers.
+
+Everything is deterministic for a given seed. Run as a script to write a
+dataset into an analytics data directory:
+
+    python benchmarks/synthetic.py analytics_data --interactions 100000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Data files written by write_dataset, in the order session() returns their records
+DATA_FILES = ("sessions.json", "interactions.json", "feedback.json")
+
+# (query_type, question templates) as classified by JSONAnalytics
+QUERY_TEMPLATES = [
+    ("temporal_question", [
+        "When did the {school} integration crisis begin?",
+        "What year did {school} open its new building?",
+    ]),
+    ("person_question", [
+        "Who was the principal of {school} in {year}?",
+        "Who were the teachers that shaped {school}?",
+    ]),
+    ("location_question", [
+        "Where is {school} located today?",
+        "Where did students from {school} go after graduating?",
+    ]),
+    ("explanation_question", [
+        "Why was {school} considered a model of educational excellence?",
+        "Why did the federal government send troops to {school}?",
+    ]),
+    ("factual_question", [
+        "What subjects were taught at {school}?",
+        "How many students attended {school} in {year}?",
+    ]),
+    ("search_request", [
+        "Find sources about {school} in {year}",
+        "Show me stories about the {school} community",
+    ]),
+    ("comparison_request", [
+        "Compare {school} and its neighbour school",
+        "What is the difference between {school} then and now?",
+    ]),
+    ("general_query", [
+        "Tell me about {school}",
+        "I am curious about {school} history",
+    ]),
+]
+SCHOOLS = ["Central High School", "Dunbar High School", "Dunbar Junior College", "Little Rock Central"]
+YEARS = [str(year) for year in range(1929, 1960)]
+DEVICES = ["desktop", "mobile", "tablet", "unknown"]
+BROWSERS = ["chrome", "safari", "firefox", "edge", "unknown"]
+
+RESPONSE_WORDS = (
+    "Dunbar Central Little Rock students teachers community history integration "
+    "excellence education civil rights principal classroom diary crisis federal "
+    "troops Huckaby Jones-Wilson curriculum graduates college school heritage "
+    "the a of and to in was were their with for that this as on by"
+).split()
+STOPWORDS = {"the", "a", "an", "of", "and", "or", "but", "is", "are"}
+
+# Token accounting: the model reported by the API, the system prompt's size
+# and roughly how many tokens a word costs
+MODEL = "gpt-3.5-turbo-0125"
+SYSTEM_PROMPT_TOKENS = 900
+TOKENS_PER_WORD = 1.3
+
+
+def extract_topics(text):
+    """Top 3 longest non-stopwords, the same rule JSONAnalytics uses"""
+    words = [word for word in text.lower().split() if word not in STOPWORDS and len(word) > 3]
+    return sorted(words, key=len, reverse=True)[:3]
+
+
+def make_response(rng, words=None):
+    """A SchoolBot-length answer of roughly 120-450 words"""
+    if words is None:
+        words = rng.randint(120, 450)
+    return " ".join(rng.choice(RESPONSE_WORDS) for _ in range(words)) + "."
+
+
+class SyntheticAnalytics:
+    """
+    Generates consistent sessions, interactions and feedback records.
+
+    `response_pool` answers are generated up front and reused, which keeps
+    million-row datasets cheap to build while response text still makes up
+    most of each interaction's bytes, as it does in production.
+    """
+
+    def __init__(self, seed=0, start=datetime.datetime(2025, 1, 1), days=365,
+                 return_rate=0.3, feedback_rate=0.2, response_pool=500):
+        """Set up the random generator and the time window sessions fall in"""
+        self.rng = random.Random(seed)
+        self.start = start
+        self.days = days
+        self.return_rate = return_rate
+        self.feedback_rate = feedback_rate
+        self.responses = [make_response(self.rng) for _ in range(response_pool)]
+        self.users = []
+
+    def _uuid(self):
+        """A reproducible uuid4-style id"""
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def session(self):
+        """One session plus its interactions and feedback, as three lists of records"""
+        rng = self.rng
+        if self.users and rng.random() < self.return_rate:
+            user_id, is_return_user = rng.choice(self.users), True
+        else:
+            user_id, is_return_user = self._uuid(), False
+            self.users.append(user_id)
+
+        session_id = self._uuid()
+        start_time = self.start + datetime.timedelta(
+            seconds=rng.randrange(self.days * 24 * 3600)
+        )
+        interactions = []
+        feedback = []
+        timestamp = start_time
+        # Every turn resends the whole conversation so far
+        prompt_tokens = SYSTEM_PROMPT_TOKENS
+        for turn in range(1, max(1, int(rng.expovariate(1 / 4))) + 1):
+            timestamp += datetime.timedelta(seconds=rng.randint(20, 180))
+            query_type, templates = rng.choice(QUERY_TEMPLATES)
+            query = rng.choice(templates).format(school=rng.choice(SCHOOLS), year=rng.choice(YEARS))
+            response = rng.choice(self.responses)
+            prompt_tokens += int(len(query.split()) * TOKENS_PER_WORD)
+            completion_tokens = int(len(response.split()) * TOKENS_PER_WORD)
+            interaction = {
+                "interaction_id": self._uuid(),
+                "session_id": session_id,
+                "timestamp": timestamp.isoformat(),
+                "query": query,
+                "query_type": query_type,
+                "response": response,
+                # Longer prompts take a little longer to answer
+                "response_time_ms": int(rng.lognormvariate(7.3, 0.5) + prompt_tokens / 10),
+                "sentiment_score": round(rng.uniform(-0.3, 0.6), 3),
+                "topics": extract_topics(query),
+                "feedback_score": None,
+                "turn": turn,
+                "model": MODEL,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "cached_tokens": 0,
+            }
+            if rng.random() < self.feedback_rate:
+                score = 5 if rng.random() < 0.8 else 1
+                interaction["feedback_score"] = score
+                feedback.append({
+                    "interaction_id": interaction["interaction_id"],
+                    "session_id": session_id,
+                    "timestamp": (timestamp + datetime.timedelta(seconds=15)).isoformat(),
+                    "feedback_score": score,
+                })
+            interactions.append(interaction)
+            prompt_tokens += completion_tokens
+
+        end_time = timestamp + datetime.timedelta(seconds=rng.randint(10, 120))
+        session = {
+            "session_id": session_id,
+            "user_id": user_id,
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "duration_seconds": (end_time - start_time).total_seconds(),
+            "interaction_count": len(interactions),
+            "device_type": rng.choice(DEVICES),
+            "browser": rng.choice(BROWSERS),
+            "is_return_user": is_return_user,
+        }
+        return [session], interactions, feedback
+
+    def generate(self, interactions):
+        """Sessions, interactions and feedback lists with about `interactions` interactions"""
+        all_sessions, all_interactions, all_feedback = [], [], []
+        while len(all_interactions) < interactions:
+            sessions, session_interactions, feedback = self.session()
+            all_sessions.extend(sessions)
+            all_interactions.extend(session_interactions)
+            all_feedback.extend(feedback)
+        return all_sessions, all_interactions, all_feedback
+
+
+def write_dataset(data_dir, interactions, seed=0, response_pool=500, inline_responses=False):
+    """Write about `interactions` interactions and matching sessions, feedback and rollups to data_dir.
+
+    Records are written session by session, so the generator never holds a
+    million-interaction dataset in memory. The rollups are then rebuilt from
+    the written files, the same way recovery backfills them. Responses go to
+    the blob store as the app stores them, or with `inline_responses` into
+    interactions.json as older versions did. Returns the number of records
+    in each file.
+    """
+    from analytics_blobs import BlobStore, externalize
+    from analytics_rollups import rebuild_rollups
+
+    os.makedirs(data_dir, exist_ok=True)
+    generator = SyntheticAnalytics(seed=seed, response_pool=response_pool)
+    responses = BlobStore(data_dir)
+    files = [open(os.path.join(data_dir, name), 'w') for name in DATA_FILES]
+    counts = [0] * len(DATA_FILES)
+    try:
+        for f in files:
+            f.write("[")
+        while counts[1] < interactions:
+            records = generator.session()
+            for position, (f, batch) in enumerate(zip(files, records)):
+                for record in batch:
+                    if DATA_FILES[position] == "interactions.json" and not inline_responses:
+                        record = externalize(record, responses)
+                    # Same separators as json.dump, so the files look like the app's own
+                    f.write((", " if counts[position] else "") + json.dumps(record))
+                    counts[position] += 1
+        for f in files:
+            f.write("]")
+    finally:
+        for f in files:
+            f.close()
+
+    rebuild_rollups(data_dir)
+    return dict(zip(DATA_FILES, counts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic SchoolBot analytics dataset")
+    parser.add_argument("data_dir")
+    parser.add_argument("--interactions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--response-pool", type=int, default=500, help="Distinct response texts")
+    parser.add_argument("--inline-responses", action="store_true",
+                        help="Keep responses in interactions.json, as older versions did")
+    args = parser.parse_args()
+
+    counts = write_dataset(args.data_dir, args.interactions, args.seed, args.response_pool, args.inline_responses)
+    print(", ".join(f"{count:,} {name}" for name, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,16 @@ import uuid
 import datetime
 from textblob import TextBlob
 import streamlit as st
+import metrics
+from analytics_storage import atomic_write
+from analytics_wal import get_log
+
 class JSONAnalytics:
     """
     A simple analytics system that stores data in JSON files.
     Tracks user sessions, interactions, and provides basic analytics.
+    Writes go to the write-ahead log in analytics_wal and reach the files
+    at its next checkpoint.
     """
     
     def __init__(self, data_dir="analytics_data"):
@@ -25,24 +31,15 @@ class JSONAnalytics:
         self._init_files()
         
     def _init_files(self):
-        """Initialize the JSON files if they don't exist"""
-        # Sessions file
-        sessions_file = os.path.join(self.data_dir, "sessions.json")
-        if not os.path.exists(sessions_file):
-            with open(sessions_file, 'w') as f:
-                json.dump([], f)
-                
-        # Interactions file
-        interactions_file = os.path.join(self.data_dir, "interactions.json")
-        if not os.path.exists(interactions_file):
-            with open(interactions_file, 'w') as f:
-                json.dump([], f)
-                
-        # Feedback file
-        feedback_file = os.path.join(self.data_dir, "feedback.json")
-        if not os.path.exists(feedback_file):
-            with open(feedback_file, 'w') as f:
-                json.dump([], f)
+        """Initialize the JSON files if they don't exist and recover them after a crash"""
+        for name in ("sessions.json", "interactions.json", "feedback.json"):
+            path = os.path.join(self.data_dir, name)
+            if not os.path.exists(path):
+                atomic_write(path, json.dumps([]))
+
+        # Repairs damaged files, replays unsaved writes and backfills the
+        # daily rollups, once per process
+        self.wal = get_log(self.data_dir)
     
     def start_session(self):
         """Start tracking a new user session"""
@@ -79,53 +76,56 @@ class JSONAnalytics:
             "is_return_user": is_return_user
         }
         
-        # Load existing sessions
-        sessions_file = os.path.join(self.data_dir, "sessions.json")
-        with open(sessions_file, 'r') as f:
-            sessions = json.load(f)
-            
-        # Add new session
-        sessions.append(session_data)
-        
-        # Save sessions
-        with open(sessions_file, 'w') as f:
-            json.dump(sessions, f)
+        self.wal.append([{"op": "session_start", "record": session_data}])
             
         return self.session_id
     
     def end_session(self):
         """End the current tracking session and update final metrics"""
+        session_end = self.finish_session()
+        if session_end:
+            self.end_sessions([session_end])
+
+    def finish_session(self, end_time=None):
+        """Close the current session and return its final metrics without saving them.
+
+        `end_time` defaults to now; the idle-session reaper passes the time of
+        the session's last activity instead.
+        """
         if not self.session_id:
-            return
+            return None
             
         # Calculate session duration
-        end_time = datetime.datetime.now()
+        if end_time is None:
+            end_time = datetime.datetime.now()
         duration_seconds = (end_time - self.session_start_time).total_seconds()
         
-        # Load sessions
-        sessions_file = os.path.join(self.data_dir, "sessions.json")
-        with open(sessions_file, 'r') as f:
-            sessions = json.load(f)
-            
-        # Update session data
-        for session in sessions:
-            if session["session_id"] == self.session_id:
-                session["end_time"] = end_time.isoformat()
-                session["duration_seconds"] = duration_seconds
-                session["interaction_count"] = self.interaction_count
-                break
-                
-        # Save sessions
-        with open(sessions_file, 'w') as f:
-            json.dump(sessions, f)
+        session_end = {
+            "session_id": self.session_id,
+            "end_time": end_time.isoformat(),
+            "duration_seconds": duration_seconds,
+            "interaction_count": self.interaction_count
+        }
             
         # Reset session tracking
         self.session_id = None
         self.session_start_time = None
         self.interaction_count = 0
         
-    def track_interaction(self, query, response, start_time=None, end_time=None):
-        """Track a single interaction between user and chatbot"""
+        return session_end
+
+    def end_sessions(self, session_ends):
+        """Save many session-end updates with a single log write"""
+        if not session_ends:
+            return
+        self.wal.append([{"op": "session_end", "record": session_end} for session_end in session_ends])
+        
+    def track_interaction(self, query, response, start_time=None, end_time=None, model=None, usage=None):
+        """Track a single interaction between user and chatbot.
+
+        `usage` holds the API's token counts: prompt_tokens, completion_tokens,
+        total_tokens and cached_tokens.
+        """
         if not self.session_id:
             return None
             
@@ -145,10 +145,14 @@ class JSONAnalytics:
         query_type = self._classify_query_type(query)
         
         # Sentiment analysis
-        sentiment = TextBlob(query).sentiment.polarity
+        with metrics.timer("schoolbot_chat_stage_seconds", stage="sentiment"):
+            sentiment = TextBlob(query).sentiment.polarity
         
         # Extract topics
         topics = self._extract_topics(query)
+
+        # Token usage, if the API reported it
+        usage = usage or {}
         
         # Store interaction data
         interaction_data = {
@@ -161,20 +165,17 @@ class JSONAnalytics:
             "response_time_ms": response_time_ms,
             "sentiment_score": sentiment,
             "topics": topics,
-            "feedback_score": None
+            "feedback_score": None,
+            "turn": self.interaction_count + 1,
+            "model": model,
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "total_tokens": usage.get("total_tokens"),
+            "cached_tokens": usage.get("cached_tokens")
         }
         
-        # Load interactions
-        interactions_file = os.path.join(self.data_dir, "interactions.json")
-        with open(interactions_file, 'r') as f:
-            interactions = json.load(f)
-            
-        # Add new interaction
-        interactions.append(interaction_data)
-        
-        # Save interactions
-        with open(interactions_file, 'w') as f:
-            json.dump(interactions, f)
+        with metrics.timer("schoolbot_chat_stage_seconds", stage="analytics_write"):
+            self.wal.append([{"op": "interaction", "record": interaction_data}])
             
         # Update interaction count
         self.interaction_count += 1
@@ -186,40 +187,15 @@ class JSONAnalytics:
         if not interaction_id:
             return
             
-        # Load interactions
-        interactions_file = os.path.join(self.data_dir, "interactions.json")
-        with open(interactions_file, 'r') as f:
-            interactions = json.load(f)
-            
-        # Update interaction with feedback
-        for interaction in interactions:
-            if interaction["interaction_id"] == interaction_id:
-                interaction["feedback_score"] = feedback_score
-                break
-                
-        # Save interactions
-        with open(interactions_file, 'w') as f:
-            json.dump(interactions, f)
-            
-        # Also store in feedback file for easier analysis
+        # Updates the interaction's feedback_score and is also stored in the
+        # feedback file for easier analysis
         feedback_data = {
             "interaction_id": interaction_id,
             "session_id": self.session_id,
             "timestamp": datetime.datetime.now().isoformat(),
             "feedback_score": feedback_score
         }
-        
-        # Load feedback
-        feedback_file = os.path.join(self.data_dir, "feedback.json")
-        with open(feedback_file, 'r') as f:
-            feedback = json.load(f)
-            
-        # Add new feedback
-        feedback.append(feedback_data)
-        
-        # Save feedback
-        with open(feedback_file, 'w') as f:
-            json.dump(feedback, f)
+        self.wal.append([{"op": "feedback", "record": feedback_data}])
     
     def _classify_query_type(self, query):
         """Classify the type of query based on text analysis"""
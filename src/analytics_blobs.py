@@ -0,0 +1,143 @@
+"""Content-addressed store for interaction response texts.
+
+Answers repeat a lot (cached and canned replies) and are most of the bytes
+of interactions.json. Each distinct response text is kept once,
+zlib-compressed, in responses.pack in the data directory. Interactions
+refer to it by the hex BLAKE2b hash of the text in `response_hash`.
+
+The pack is append-only: each entry is a header line "<hash> <length>\\n"
+followed by `length` bytes of compressed text. The hash -> (offset, length)
+index is kept in memory and extended by scanning the headers of entries
+added since the last scan, so readers in other processes need nothing but
+the file. An entry cut short by a crash is skipped by readers and cut off
+by the next write.
+"""
+import os
+import zlib
+import hashlib
+import threading
+from analytics_storage import fsync_dir
+
+PACK_FILE = "responses.pack"
+HASH_BYTES = 16
+COMPRESSION_LEVEL = 9
+
+_stores_lock = threading.Lock()
+# absolute data_dir -> BlobStore
+_stores = {}
+
+
+def response_hash(text):
+    """The hex hash a response text is stored under"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=HASH_BYTES).hexdigest()
+
+
+class BlobStore:
+    """
+    The response pack of one data directory. put() and sync() are for the
+    process that writes analytics; get_many() can be used from anywhere.
+    """
+
+    def __init__(self, data_dir):
+        """Open the pack lazily; nothing is read until the first lookup"""
+        self.path = os.path.join(data_dir, PACK_FILE)
+        self._lock = threading.Lock()
+        # hash -> (offset of the compressed text, its length)
+        self._index = {}
+        self._scanned = 0
+        self._file = None
+
+    def _scan(self):
+        """Index the entries appended since the last scan, stopping at an incomplete one"""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return
+        if size <= self._scanned:
+            return
+        with open(self.path, 'rb') as f:
+            position = self._scanned
+            f.seek(position)
+            while True:
+                header = f.readline()
+                try:
+                    digest, length = header.split()
+                    length = int(length)
+                except ValueError:
+                    break
+                start = position + len(header)
+                if not header.endswith(b"\n") or start + length > size:
+                    break
+                self._index[digest.decode("ascii")] = (start, length)
+                position = start + length
+                f.seek(position)
+        self._scanned = position
+
+    def put(self, text):
+        """Store a text unless it is already there; returns its hash"""
+        digest = response_hash(text)
+        with self._lock:
+            if digest not in self._index:
+                self._scan()
+            if digest in self._index:
+                return digest
+
+            if self._file is None:
+                created = not os.path.exists(self.path)
+                self._file = open(self.path, 'ab')
+                # Cut off an entry a crash left half written
+                if self._file.tell() > self._scanned:
+                    self._file.truncate(self._scanned)
+                if created:
+                    fsync_dir(os.path.dirname(self.path))
+            data = zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+            header = f"{digest} {len(data)}\n".encode("ascii")
+            self._file.write(header + data)
+            self._file.flush()
+            self._index[digest] = (self._scanned + len(header), len(data))
+            self._scanned += len(header) + len(data)
+        return digest
+
+    def sync(self):
+        """Make everything put so far durable"""
+        with self._lock:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+
+    def get_many(self, digests):
+        """{hash: text} for the given hashes; unknown hashes and None are left out"""
+        wanted = {digest for digest in digests if isinstance(digest, str)}
+        with self._lock:
+            if not wanted.issubset(self._index):
+                self._scan()
+            entries = sorted((self._index[digest], digest) for digest in wanted if digest in self._index)
+        texts = {}
+        if entries:
+            with open(self.path, 'rb') as f:
+                for (start, length), digest in entries:
+                    f.seek(start)
+                    texts[digest] = zlib.decompress(f.read(length)).decode("utf-8")
+        return texts
+
+
+def get_store(data_dir="analytics_data"):
+    """The process's store for a data directory"""
+    key = os.path.abspath(data_dir)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = BlobStore(data_dir)
+    return store
+
+
+def externalize(record, store):
+    """An interaction record with its inline `response` swapped for the `response_hash` of a stored copy"""
+    if "response" not in record:
+        return record
+    externalized = {}
+    for key, value in record.items():
+        if key == "response":
+            externalized["response_hash"] = None if value is None else store.put(value)
+        else:
+            externalized[key] = value
+    return externalized
@@ -0,0 +1,236 @@
+"""Export analytics data for a date range as CSV, JSONL or Parquet.
+
+The analytics files are read as a stream of records and written out in
+chunks of `chunk_rows`, so memory use stays bounded however large the
+history is. Used by the dashboard's Export section and as a CLI:
+
+    python src/analytics_export.py interactions out.csv --start 2025-01-01 --end 2025-03-31
+    python src/analytics_export.py sessions out.parquet --columns session_id,user_id,start_time
+
+The format is taken from the output file's extension unless --format is given.
+"""
+import os
+import sys
+import json
+import argparse
+import datetime
+import pandas as pd
+from analytics_blobs import get_store
+from analytics_loader import FEEDBACK_DTYPES, INTERACTION_DTYPES, SESSION_DTYPES
+
+# table -> (file name, column dtypes, timestamp column the date range applies to).
+# An interaction's response text is read from the blob store by its response_hash.
+TABLES = {
+    "sessions": ("sessions.json", SESSION_DTYPES, "start_time"),
+    "interactions": ("interactions.json", {**INTERACTION_DTYPES, "response": "object"}, "timestamp"),
+    "feedback": ("feedback.json", FEEDBACK_DTYPES, "timestamp"),
+}
+FORMATS = ("csv", "jsonl", "parquet")
+MIME_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/octet-stream"}
+
+# Records per written chunk, and characters read from disk at a time
+CHUNK_ROWS = 10_000
+READ_SIZE = 1024 * 1024
+
+# Separator for list columns (topics) in CSV output
+LIST_SEPARATOR = "; "
+
+
+def iter_records(path, read_size=READ_SIZE):
+    """Yield the records of a JSON array file one at a time, without loading the file.
+
+    The file is read `read_size` characters at a time and each element is
+    decoded with JSONDecoder.raw_decode as soon as it is complete, so only
+    the current element and one read buffer are ever in memory.
+    """
+    if not os.path.exists(path):
+        return
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(read_size)
+        position = 0
+        at_eof = len(buffer) < read_size
+
+        while True:
+            # Skip whitespace, the opening bracket and separators
+            while position < len(buffer) and buffer[position] in " \t\r\n,[":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                record, end = None, None
+            if end is not None and (end < len(buffer) or at_eof):
+                yield record
+                position = end
+                continue
+
+            # Element incomplete (or nothing left in the buffer): read more
+            more = f.read(read_size)
+            if not more:
+                if position < len(buffer):
+                    raise ValueError(f"{path} ends in the middle of a record")
+                return
+            buffer = buffer[position:] + more
+            position = 0
+            at_eof = len(more) < read_size
+
+
+def in_date_range(timestamp, start_date, end_date):
+    """Whether an ISO timestamp string falls on a day in [start_date, end_date]"""
+    if not timestamp:
+        return False
+    day = timestamp[:10]
+    return (start_date is None or day >= start_date.isoformat()) and \
+        (end_date is None or day <= end_date.isoformat())
+
+
+def table_columns(table, columns=None):
+    """The columns to export from a table (default: all), checking they exist"""
+    dtypes = TABLES[table][1]
+    columns = list(columns or dtypes)
+    unknown = [column for column in columns if column not in dtypes]
+    if unknown:
+        raise ValueError(f"Unknown {table} columns: {', '.join(unknown)}")
+    return columns
+
+
+def iter_record_chunks(table, data_dir="analytics_data", start_date=None, end_date=None,
+                       columns=None, chunk_rows=CHUNK_ROWS):
+    """Yield lists of at most `chunk_rows` records from a table, filtered and projected"""
+    file_name, _, time_column = TABLES[table]
+    columns = table_columns(table, columns)
+
+    chunk = []
+    # (row, response_hash) for rows whose response is in the blob store
+    stored_responses = []
+    for record in iter_records(os.path.join(data_dir, file_name)):
+        if not in_date_range(record.get(time_column), start_date, end_date):
+            continue
+        row = {column: record.get(column) for column in columns}
+        chunk.append(row)
+        if "response" in row and record.get("response_hash"):
+            stored_responses.append((row, record["response_hash"]))
+        if len(chunk) >= chunk_rows:
+            fill_responses(stored_responses, data_dir)
+            yield chunk
+            chunk = []
+            stored_responses = []
+    if chunk:
+        fill_responses(stored_responses, data_dir)
+        yield chunk
+
+
+def fill_responses(rows, data_dir="analytics_data"):
+    """Set the response text of (row, response_hash) pairs from the blob store"""
+    if not rows:
+        return
+    texts = get_store(data_dir).get_many(digest for _, digest in rows)
+    for row, digest in rows:
+        row["response"] = texts.get(digest)
+
+
+def export_frame(records, dtypes, columns):
+    """A DataFrame of one chunk with timestamps parsed and floats typed; list columns stay lists"""
+    df = pd.DataFrame(records, columns=columns)
+    for column in columns:
+        dtype = dtypes[column]
+        if dtype == "datetime64[ns]":
+            df[column] = pd.to_datetime(df[column], format="ISO8601")
+        elif dtype in ("float32", "float64", "bool"):
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def parquet_schema(dtypes, columns):
+    """A pyarrow schema for the columns, fixed up front so every chunk matches"""
+    import pyarrow as pa
+
+    types = {
+        "object": pa.string(),
+        "category": pa.string(),
+        "datetime64[ns]": pa.timestamp("ns"),
+        "float64": pa.float64(),
+        "float32": pa.float32(),
+        "int32": pa.int32(),
+        "bool": pa.bool_(),
+        "exploded": pa.list_(pa.string()),
+    }
+    return pa.schema([(column, types[dtypes[column]]) for column in columns])
+
+
+def export(table, output, data_dir="analytics_data", start_date=None, end_date=None,
+           columns=None, fmt=None, chunk_rows=CHUNK_ROWS):
+    """Write a table's records in the date range to `output`; returns the number of rows written"""
+    fmt = fmt or os.path.splitext(output)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format {fmt!r}; use one of {', '.join(FORMATS)}")
+    dtypes = TABLES[table][1]
+    columns = table_columns(table, columns)
+    chunks = iter_record_chunks(table, data_dir, start_date, end_date, columns, chunk_rows)
+
+    rows = 0
+    if fmt == "jsonl":
+        with open(output, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in chunk)
+                rows += len(chunk)
+        return rows
+
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = parquet_schema(dtypes, columns)
+        with pq.ParquetWriter(output, schema) as writer:
+            for chunk in chunks:
+                frame = export_frame(chunk, dtypes, columns)
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+                rows += len(chunk)
+        return rows
+
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        # Header first, so an empty export still names its columns
+        f.write(",".join(columns) + "\n")
+        for chunk in chunks:
+            frame = export_frame(chunk, dtypes, columns)
+            for column in columns:
+                if dtypes[column] == "exploded":
+                    frame[column] = frame[column].map(
+                        lambda values: LIST_SEPARATOR.join(values) if isinstance(values, list) else ""
+                    )
+            frame.to_csv(f, header=False, index=False)
+            rows += len(chunk)
+    return rows
+
+
+def parse_date(value):
+    """argparse type for YYYY-MM-DD dates"""
+    return datetime.date.fromisoformat(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export SchoolBot analytics data in bounded-memory chunks")
+    parser.add_argument("table", choices=list(TABLES))
+    parser.add_argument("output", help="Output file; .csv, .jsonl or .parquet")
+    parser.add_argument("--data-dir", default="analytics_data")
+    parser.add_argument("--start", type=parse_date, help="First day to include (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument("--columns", help="Comma-separated columns to export (default: all)")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: from the file extension)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    columns = args.columns.split(",") if args.columns else None
+    try:
+        rows = export(args.table, args.output, args.data_dir, args.start, args.end,
+                      columns, args.format, args.chunk_rows)
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+    print(f"Wrote {rows:,} {args.table} rows to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
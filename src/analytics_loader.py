@@ -0,0 +1,238 @@
+import os
+import json
+import threading
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Column dtypes for each analytics file. Timestamps are parsed once here so
+# the dashboards never call pd.to_datetime themselves. Repeated strings
+# (session and user ids on child records, query types, device info) are
+# categoricals, i.e. integer codes plus one copy of each distinct value.
+# "exploded" list columns are dropped from the frame and kept as a separate
+# (row, value) categorical table.
+SESSION_DTYPES = {
+    "session_id": "object",
+    "user_id": "category",
+    "start_time": "datetime64[ns]",
+    "end_time": "datetime64[ns]",
+    "duration_seconds": "float64",
+    "interaction_count": "int32",
+    "device_type": "category",
+    "browser": "category",
+    "is_return_user": "bool",
+}
+INTERACTION_DTYPES = {
+    "interaction_id": "object",
+    "session_id": "category",
+    "timestamp": "datetime64[ns]",
+    "query": "object",
+    "query_type": "category",
+    # Hash of the response text in analytics_blobs; the text is only read when shown
+    "response_hash": "category",
+    # Inline text of interactions recorded before analytics_blobs, until a
+    # writer's recovery moves it there; all missing after that
+    "response": "category",
+    "response_time_ms": "int32",
+    "sentiment_score": "float32",
+    "topics": "exploded",
+    "feedback_score": "float32",
+    # Missing on interactions recorded before token accounting
+    "turn": "float32",
+    "model": "category",
+    "prompt_tokens": "float32",
+    "completion_tokens": "float32",
+    "total_tokens": "float32",
+    "cached_tokens": "float32",
+}
+FEEDBACK_DTYPES = {
+    "interaction_id": "object",
+    "session_id": "category",
+    "timestamp": "datetime64[ns]",
+    "feedback_score": "float32",
+}
+
+# Bytes just before the closing bracket that must be unchanged for a file
+# to count as appended-to rather than rewritten
+TAIL_CHECK_BYTES = 256
+
+# Data file name -> generation, bumped by analytics_wal around every write
+# that changes records already in the file rather than appending new ones
+GENERATIONS_FILE = "generations.json"
+
+# path -> {"signature", "generation", "frame", "exploded", "offset", "check"} from the last parse
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def file_signature(path):
+    """(size, mtime) of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def file_generation(path):
+    """The generation of a data file: even when no rewrite is under way, None if unreadable.
+
+    A file's generation changes only when records already in it are changed,
+    so a reader that saw the same even generation before and after parsing
+    knows the file has only been appended to since.
+    """
+    try:
+        with open(os.path.join(os.path.dirname(path), GENERATIONS_FILE), 'rb') as f:
+            return json.load(f).get(os.path.basename(path), 0)
+    except FileNotFoundError:
+        return 0
+    except ValueError:
+        return None
+
+
+def to_frame(records, dtypes, first_row=0):
+    """Build a compact DataFrame from analytics records.
+
+    Returns the frame and a dict of exploded tables, one per "exploded"
+    column, whose `row` refers to the record's position counting from
+    `first_row`.
+    """
+    df = pd.DataFrame(records, columns=list(dtypes))
+    exploded = {}
+    for column, dtype in dtypes.items():
+        if dtype == "datetime64[ns]":
+            df[column] = pd.to_datetime(df[column], format="ISO8601")
+        elif dtype == "exploded":
+            values = df.pop(column).explode()
+            values = values[values.notna()]
+            exploded[column] = pd.DataFrame({
+                "row": (values.index + first_row).astype("int32"),
+                "value": values.astype("category").values,
+            })
+        elif dtype != "object":
+            df[column] = df[column].astype(dtype)
+    return df, exploded
+
+
+def concat_frames(first, second):
+    """Append one compact frame to another, keeping categorical columns categorical"""
+    frame = pd.concat([first, second], ignore_index=True)
+    for column in first.columns:
+        if isinstance(first[column].dtype, pd.CategoricalDtype):
+            frame[column] = union_categoricals([first[column], second[column]], ignore_order=True)
+    return frame
+
+
+def _parse_full(path, dtypes):
+    """Parse a whole analytics file and remember where its record list ends"""
+    content = b"[]"
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            content = f.read()
+    records = json.loads(content)
+    frame, exploded = to_frame(records, dtypes)
+
+    # Appended records are written just before the closing bracket
+    offset = content.rindex(b"]")
+    return {
+        "frame": frame,
+        "exploded": exploded,
+        "offset": offset,
+        "check": content[max(0, offset - TAIL_CHECK_BYTES):offset],
+    }
+
+
+def _parse_appended(path, cached, dtypes):
+    """Parse only the records appended since the cached parse.
+
+    The analytics files are JSON arrays rewritten in full on every write, so
+    an append leaves every byte before the old closing bracket in place and
+    puts ", {...}" where the bracket was. Only called when the file's
+    generation shows no record was changed in place; anything else that
+    fails the tail check returns None so the caller re-parses the file.
+    """
+    offset = cached["offset"]
+    check = cached["check"]
+    if not cached["frame"].shape[0]:
+        return None
+
+    with open(path, 'rb') as f:
+        f.seek(offset - len(check))
+        if f.read(len(check)) != check:
+            return None
+        tail = f.read()
+
+    if not tail.startswith(b","):
+        return None
+    try:
+        records = json.loads(b"[" + tail[1:])
+    except ValueError:
+        return None
+
+    new_frame, new_exploded = to_frame(records, dtypes, first_row=len(cached["frame"]))
+    end = tail.rindex(b"]")
+    return {
+        "frame": concat_frames(cached["frame"], new_frame),
+        "exploded": {
+            column: concat_frames(table, new_exploded[column])
+            for column, table in cached["exploded"].items()
+        },
+        "offset": offset + end,
+        "check": (check + tail[:end])[-TAIL_CHECK_BYTES:],
+    }
+
+
+def load_frame(path, dtypes, incremental=True):
+    """Parse one analytics file into a DataFrame, reusing earlier work where possible.
+
+    An unchanged file (same size, mtime and generation) is not read at all.
+    With `incremental`, a file that has only grown by appended records is
+    read from the last consumed offset and the new rows are concatenated
+    onto the cached frame. The returned frame is shared between callers and
+    must not be modified.
+    """
+    return _load_entry(path, dtypes, incremental)["frame"]
+
+
+def _load_entry(path, dtypes, incremental=True):
+    """The up-to-date cache entry for a file, parsing as little as possible"""
+    generation = file_generation(path)
+    signature = file_signature(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached and cached["signature"] == signature and cached["generation"] == generation:
+        return cached
+
+    entry = None
+    if (incremental and cached and cached["generation"] == generation and signature is not None
+            and signature[0] > cached["offset"]):
+        entry = _parse_appended(path, cached, dtypes)
+    if entry is None:
+        entry = _parse_full(path, dtypes)
+    entry["signature"] = signature
+    # A rewrite under way or finished while the file was read may or may not be
+    # in this parse; with no generation the next load parses the file again
+    stable = generation is not None and generation % 2 == 0 and file_generation(path) == generation
+    entry["generation"] = generation if stable else None
+
+    with _cache_lock:
+        _cache[path] = entry
+    return entry
+
+
+def load_frames(data_dir="analytics_data", incremental=True):
+    """Sessions, interactions and feedback DataFrames for an analytics data directory"""
+    sessions_df = load_frame(os.path.join(data_dir, "sessions.json"), SESSION_DTYPES, incremental)
+    interactions_df = load_frame(os.path.join(data_dir, "interactions.json"), INTERACTION_DTYPES, incremental)
+    feedback_df = load_frame(os.path.join(data_dir, "feedback.json"), FEEDBACK_DTYPES, incremental)
+    return sessions_df, interactions_df, feedback_df
+
+
+def load_topics(data_dir="analytics_data", incremental=True):
+    """Interaction topics as a table of (row, topic), one line per topic mention.
+
+    `row` is the interaction's position in the interactions frame from
+    load_frames, and `topic` is categorical.
+    """
+    path = os.path.join(data_dir, "interactions.json")
+    topics = _load_entry(path, INTERACTION_DTYPES, incremental)["exploded"]["topics"]
+    return topics.rename(columns={"value": "topic"})
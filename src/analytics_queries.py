@@ -0,0 +1,332 @@
+import os
+import datetime
+import functools
+import threading
+import numpy as np
+import pandas as pd
+from analytics_blobs import get_store
+from analytics_loader import file_signature, load_frames, load_topics
+from analytics_rollups import (
+    ROLLUPS_FILE, latency_by_query_type, latency_sketches,
+    load_rollups, summarize,
+)
+
+DATA_DIR = "analytics_data"
+DATA_FILES = ("sessions.json", "interactions.json", "feedback.json", ROLLUPS_FILE)
+
+# Results kept per query; the oldest entry is dropped past this
+MEMO_SIZE = 32
+
+# Ranges of at most this many days count unique users exactly from the raw
+# sessions; longer ones use the rollups' HyperLogLog estimate. 0 always estimates.
+EXACT_UNIQUE_DAYS = int(os.environ.get("SCHOOLBOT_EXACT_UNIQUE_DAYS", 31))
+
+FEEDBACK_LABELS = {"positive": "👍 Positive", "negative": "👎 Negative"}
+
+# Response-time percentiles shown on the dashboard, as column name -> quantile
+LATENCY_QUANTILES = {"p50": 0.5, "p90": 0.9, "p95": 0.95, "p99": 0.99}
+
+# USD per million (prompt, cached prompt, completion) tokens, matched by the
+# longest model name prefix so dated versions like gpt-3.5-turbo-0125 count
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+# Upper edges of the prompt-size buckets in the response time chart
+PROMPT_TOKEN_BINS = (500, 1000, 2000, 4000, 8000)
+
+# Raw Data explorer: id columns that can be searched per table, columns left
+# out unless asked for, and the most rows ever returned in one page
+RAW_TABLES = {
+    "sessions": ("session_id", "user_id"),
+    "interactions": ("interaction_id", "session_id"),
+}
+HIDDEN_COLUMNS = ("response", "response_hash")
+# Columns read from the blob store for the rows of a page only: name -> hash column
+STORED_COLUMNS = {"response": "response_hash"}
+PAGE_SIZES = (25, 50, 100)
+MAX_PAGE_SIZE = max(PAGE_SIZES)
+
+
+def data_version(data_dir=DATA_DIR):
+    """Signature of every analytics file; changes whenever any of them is written"""
+    return tuple(file_signature(os.path.join(data_dir, name)) for name in DATA_FILES)
+
+
+def memoized(query):
+    """Cache a query's result per (date range, data directory, options) and data version.
+
+    Queries take a `(start_date, end_date)` tuple of inclusive dates and
+    optionally keyword options such as a bucket size. Results are shared
+    between callers and must not be modified.
+    """
+    cache = {}
+    lock = threading.Lock()
+
+    @functools.wraps(query)
+    def wrapper(date_range, data_dir=DATA_DIR, **options):
+        key = (tuple(date_range), data_dir, tuple(sorted(options.items())))
+        version = data_version(data_dir)
+        with lock:
+            cached = cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        result = query(tuple(date_range), data_dir, **options)
+        with lock:
+            cache.pop(key, None)
+            cache[key] = (version, result)
+            if len(cache) > MEMO_SIZE:
+                del cache[next(iter(cache))]
+        return result
+
+    wrapper.cache = cache
+    return wrapper
+
+
+def date_bounds(data_dir=DATA_DIR):
+    """First and last session dates, or the last 30 days if there are no sessions"""
+    sessions_df, _, _ = load_frames(data_dir)
+    if sessions_df.empty:
+        today = datetime.datetime.now().date()
+        return today - datetime.timedelta(days=30), today
+    return sessions_df['start_time'].min().date(), sessions_df['start_time'].max().date()
+
+
+def in_range(timestamps, date_range):
+    """Boolean mask of timestamps falling on a day in the inclusive date range"""
+    start = pd.Timestamp(date_range[0])
+    end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+    return (timestamps >= start) & (timestamps < end)
+
+
+def count_topics(topics_table, rows):
+    """Topic counts from a (row, topic) table for the given interaction rows"""
+    mentioned = topics_table.loc[topics_table['row'].isin(rows), 'topic']
+    counts = mentioned.value_counts()
+    counts = counts[counts > 0].reset_index()
+    counts.columns = ['topic', 'count']
+    return counts
+
+
+def rating_frame(positive, negative):
+    """A rating/count DataFrame for the feedback pie, without empty ratings"""
+    counts = pd.DataFrame({
+        'rating': [FEEDBACK_LABELS["positive"], FEEDBACK_LABELS["negative"]],
+        'count': [positive, negative],
+    })
+    return counts[counts['count'] > 0].reset_index(drop=True)
+
+
+@memoized
+def load(date_range, data_dir=DATA_DIR):
+    """Sessions started and interactions made within the date range"""
+    sessions_df, interactions_df, _ = load_frames(data_dir)
+    sessions = sessions_df[in_range(sessions_df['start_time'], date_range)]
+    interactions = interactions_df[in_range(interactions_df['timestamp'], date_range)]
+    return sessions, interactions
+
+
+@memoized
+def key_metrics(date_range, data_dir=DATA_DIR):
+    """Unique users, sessions, interactions and average session minutes, from the daily rollups.
+
+    `unique_users_exact` says whether unique users were counted from the raw
+    sessions (short ranges) or estimated from the daily sketches.
+    """
+    summary = summarize(load_rollups(data_dir), *date_range)
+    exact = (date_range[1] - date_range[0]).days + 1 <= EXACT_UNIQUE_DAYS
+    if exact:
+        sessions, _ = load(date_range, data_dir)
+        unique_users = sessions['user_id'].nunique()
+    else:
+        unique_users = summary["unique_users"]
+    return {
+        "unique_users": unique_users,
+        "unique_users_exact": exact,
+        "total_sessions": summary["sessions"],
+        "total_interactions": summary["interactions"],
+        "avg_session_minutes": summary["avg_duration_seconds"] / 60,
+    }
+
+
+@memoized
+def query_type_distribution(date_range, data_dir=DATA_DIR):
+    """Interactions per query type, as a query_type/count DataFrame"""
+    summary = summarize(load_rollups(data_dir), *date_range)
+    counts = pd.DataFrame(list(summary["query_types"].items()), columns=['query_type', 'count'])
+    return counts[counts['count'] > 0].reset_index(drop=True)
+
+
+@memoized
+def topic_counts(date_range, data_dir=DATA_DIR):
+    """Occurrences of each topic, most common first, as a topic/count DataFrame"""
+    _, interactions = load(date_range, data_dir)
+    return count_topics(load_topics(data_dir), interactions.index)
+
+
+@memoized
+def feedback_distribution(date_range, data_dir=DATA_DIR):
+    """Positive and negative feedback counts, as a rating/count DataFrame"""
+    summary = summarize(load_rollups(data_dir), *date_range)
+    return rating_frame(summary["feedback"]["positive"], summary["feedback"]["negative"])
+
+
+def quantile_row(sketch):
+    """Count and LATENCY_QUANTILES percentiles of a response-time sketch"""
+    row = {"count": len(sketch)}
+    for column, q in LATENCY_QUANTILES.items():
+        row[column] = sketch.quantile(q)
+    return row
+
+
+@memoized
+def latency_percentiles(date_range, data_dir=DATA_DIR, bucket="day", query_type=None):
+    """Response-time percentiles per day or hour, from the rollups' quantile sketches"""
+    periods = latency_sketches(load_rollups(data_dir), *date_range, bucket=bucket, query_type=query_type)
+    rows = [dict(period=period, **quantile_row(sketch)) for period, sketch in periods]
+    return pd.DataFrame(rows, columns=["period", "count", *LATENCY_QUANTILES])
+
+
+@memoized
+def latency_by_type(date_range, data_dir=DATA_DIR):
+    """Response-time percentiles per query type over the whole range"""
+    sketches = latency_by_query_type(load_rollups(data_dir), *date_range)
+    rows = [dict(query_type=name, **quantile_row(sketch)) for name, sketch in sorted(sketches.items())]
+    return pd.DataFrame(rows, columns=["query_type", "count", *LATENCY_QUANTILES])
+
+
+def model_prices(model):
+    """(prompt, cached prompt, completion) USD per million tokens for a model, or None"""
+    matches = [name for name in MODEL_PRICES if str(model).startswith(name)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def interaction_costs(interactions):
+    """Estimated USD cost of each interaction; NaN where tokens or the model's price are unknown"""
+    prices = {model: model_prices(model) for model in interactions['model'].dropna().unique()}
+    prices = pd.DataFrame(
+        [(model, *price) for model, price in prices.items() if price],
+        columns=['model', 'prompt', 'cached', 'completion'],
+    ).set_index('model')
+    rates = prices.reindex(interactions['model'].astype(object)).to_numpy(dtype="float64")
+
+    cached = interactions['cached_tokens'].fillna(0).to_numpy(dtype="float64")
+    uncached = interactions['prompt_tokens'].to_numpy(dtype="float64") - cached
+    completion = interactions['completion_tokens'].to_numpy(dtype="float64")
+    cost = (uncached * rates[:, 0] + cached * rates[:, 1] + completion * rates[:, 2]) / 1e6
+    return pd.Series(cost, index=interactions.index)
+
+
+@memoized
+def token_usage(date_range, data_dir=DATA_DIR):
+    """Token totals, estimated cost and cached share for interactions with token counts"""
+    _, interactions = load(date_range, data_dir)
+    tracked = interactions[interactions['total_tokens'].notna()]
+    # float32 columns are summed in float64 so large totals stay exact
+    prompt = tracked['prompt_tokens'].to_numpy(dtype="float64").sum()
+    cached = tracked['cached_tokens'].to_numpy(dtype="float64")
+    return {
+        "interactions": len(tracked),
+        "sessions": tracked['session_id'].nunique(),
+        "total_tokens": int(tracked['total_tokens'].to_numpy(dtype="float64").sum()),
+        "cost": float(interaction_costs(tracked).sum()),
+        "cached_share": float(cached[~np.isnan(cached)].sum() / prompt) if prompt else 0.0,
+    }
+
+
+@memoized
+def tokens_by_turn(date_range, data_dir=DATA_DIR):
+    """Mean prompt and completion tokens and response time by turn number within a session"""
+    _, interactions = load(date_range, data_dir)
+    tracked = interactions[interactions['total_tokens'].notna() & interactions['turn'].notna()]
+    by_turn = tracked.groupby(tracked['turn'].astype("int32")).agg(
+        interactions=('total_tokens', 'size'),
+        prompt_tokens=('prompt_tokens', 'mean'),
+        completion_tokens=('completion_tokens', 'mean'),
+        response_time_ms=('response_time_ms', 'mean'),
+    )
+    return by_turn.reset_index()
+
+
+@memoized
+def session_costs(date_range, data_dir=DATA_DIR):
+    """Turns, tokens and estimated cost per session, most expensive first"""
+    _, interactions = load(date_range, data_dir)
+    tracked = interactions[interactions['total_tokens'].notna()]
+    costs = tracked.assign(cost=interaction_costs(tracked)).groupby('session_id', observed=True).agg(
+        turns=('total_tokens', 'size'),
+        total_tokens=('total_tokens', 'sum'),
+        cost=('cost', 'sum'),
+    )
+    return costs.sort_values('cost', ascending=False).reset_index()
+
+
+@memoized
+def latency_by_prompt_size(date_range, data_dir=DATA_DIR):
+    """Response-time percentiles per prompt-token bucket, to show what long contexts cost"""
+    _, interactions = load(date_range, data_dir)
+    tracked = interactions[interactions['prompt_tokens'].notna()]
+    edges = [0, *PROMPT_TOKEN_BINS, float("inf")]
+    labels = [f"{low:,}-{high:,}" for low, high in zip(edges, PROMPT_TOKEN_BINS)] + [f"{PROMPT_TOKEN_BINS[-1]:,}+"]
+    buckets = pd.cut(tracked['prompt_tokens'], edges, labels=labels, right=False)
+    by_bucket = tracked.groupby(buckets, observed=True)['response_time_ms'].describe(percentiles=[0.5, 0.9])
+    by_bucket = by_bucket.rename(columns={'50%': 'p50', '90%': 'p90'})[['count', 'p50', 'p90']]
+    return by_bucket.rename_axis('prompt_tokens').reset_index()
+
+
+def id_matches(ids, text):
+    """Boolean mask of ids containing `text`; categorical ids are matched per distinct value"""
+    if isinstance(ids.dtype, pd.CategoricalDtype):
+        categories = ids.cat.categories
+        return ids.isin(categories[categories.astype(str).str.contains(text, regex=False)])
+    return ids.astype(str).str.contains(text, regex=False, na=False)
+
+
+def raw_columns(table, data_dir=DATA_DIR):
+    """All columns of a raw table, and the ones shown by default"""
+    sessions_df, interactions_df, _ = load_frames(data_dir)
+    columns = list((sessions_df if table == "sessions" else interactions_df).columns)
+    columns += [name for name, source in STORED_COLUMNS.items() if source in columns and name not in columns]
+    return columns, [column for column in columns if column not in HIDDEN_COLUMNS]
+
+
+def search_raw(table, date_range, data_dir=DATA_DIR, search=""):
+    """Rows of a raw table in the date range whose id columns contain `search`"""
+    sessions, interactions = load(date_range, data_dir)
+    frame = sessions if table == "sessions" else interactions
+
+    search = search.strip()
+    if not search:
+        return frame
+    mask = pd.Series(False, index=frame.index)
+    for column in RAW_TABLES[table]:
+        mask |= id_matches(frame[column], search)
+    return frame[mask]
+
+
+def page_slice(frame, columns=None, page=1, page_size=PAGE_SIZES[0], data_dir=DATA_DIR):
+    """One page of `frame`, cut down to `columns` (default: all but the hidden ones).
+
+    The page size is capped at MAX_PAGE_SIZE, so at most that many rows
+    are ever handed to the browser. Stored columns such as response are
+    read from the blob store for just those rows, or taken from the frame
+    for interactions whose text is still inline.
+    """
+    if columns is None:
+        columns = [column for column in frame.columns if column not in HIDDEN_COLUMNS]
+
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    start = (max(page, 1) - 1) * page_size
+    rows = frame.iloc[start:start + page_size]
+    for name, source in STORED_COLUMNS.items():
+        if name in columns and source in rows:
+            texts = get_store(data_dir).get_many(rows[source].unique())
+            values = rows[source].astype(object).map(texts)
+            if name in rows:
+                # Rows without a hash still hold their text inline
+                values = values.where(rows[source].notna(), rows[name].astype(object))
+            rows = rows.assign(**{name: values})
+    return rows[[column for column in rows.columns if column in columns]]
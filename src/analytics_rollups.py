@@ -0,0 +1,319 @@
+import os
+import json
+import datetime
+import threading
+from analytics_loader import file_signature
+from analytics_sketches import DDSketch, HyperLogLog
+from analytics_storage import atomic_write
+
+ROLLUPS_FILE = "rollups.json"
+
+# Bumped whenever the rollup layout changes; older files are rebuilt from the raw data
+ROLLUPS_VERSION = 2
+
+# Feedback scores above this count as positive, as on the dashboards
+POSITIVE_FEEDBACK_THRESHOLD = 3
+
+# Serializes read-modify-write cycles on rollups.json across session threads
+_rollups_lock = threading.Lock()
+
+# Raw files the rollups are computed from
+RAW_FILES = ("sessions.json", "interactions.json")
+
+# path -> (file signature, parsed rollups) for readers
+_read_cache = {}
+# path -> ((rollups.json signature, *raw file signatures), rollups computed
+# from the raw files), for readers of a directory no writer has backfilled yet
+_computed_cache = {}
+
+
+def empty_day():
+    """A rollup row for a day with no activity.
+
+    `users` is a HyperLogLog sketch of the day's user ids. `latency` holds
+    DDSketches of response times in ms: one per hour ("hours", "00"-"23")
+    and one per query type ("types"). Sketches stay in their to_string()
+    form until an event updates them, so only those are ever decoded.
+    """
+    return {
+        "sessions": 0,
+        "users": HyperLogLog(),
+        "interactions": 0,
+        "ended_sessions": 0,
+        "duration_seconds": 0.0,
+        "query_types": {},
+        "feedback": {"positive": 0, "negative": 0},
+        "latency": {"hours": {}, "types": {}},
+    }
+
+
+def feedback_rating(score):
+    """'positive' or 'negative' for a feedback score"""
+    return "positive" if score > POSITIVE_FEEDBACK_THRESHOLD else "negative"
+
+
+def as_sketch(value, cls):
+    """A sketch object from either its object or its to_string() form"""
+    return value if isinstance(value, cls) else cls.from_string(value)
+
+
+def day_of(timestamp):
+    """The YYYY-MM-DD day of an ISO timestamp string or datetime"""
+    if isinstance(timestamp, str):
+        return timestamp[:10]
+    return timestamp.date().isoformat()
+
+
+def hour_of(timestamp):
+    """The two-digit hour of an ISO timestamp string or datetime"""
+    if isinstance(timestamp, str):
+        return timestamp[11:13]
+    return f"{timestamp.hour:02d}"
+
+
+def apply_event(rollups, event):
+    """Fold one analytics event into the rollups in place.
+
+    Events are dicts with a "type" and the "day" they count towards:
+    - session_start: user_id
+    - session_end: duration_seconds (day is the session's start day)
+    - interaction: query_type, and hour plus response_time_ms when known
+    - feedback: score, previous_score (None unless the rating is being changed)
+    """
+    day = rollups["days"].setdefault(event["day"], empty_day())
+    kind = event["type"]
+
+    if kind == "session_start":
+        day["sessions"] += 1
+        day["users"] = as_sketch(day["users"], HyperLogLog)
+        day["users"].add(event["user_id"])
+    elif kind == "session_end":
+        day["ended_sessions"] += 1
+        day["duration_seconds"] += event["duration_seconds"]
+    elif kind == "interaction":
+        query_types = day["query_types"]
+        query_types[event["query_type"]] = query_types.get(event["query_type"], 0) + 1
+        day["interactions"] += 1
+        if event.get("response_time_ms") is not None:
+            for sketches, key in ((day["latency"]["hours"], event["hour"]),
+                                  (day["latency"]["types"], event["query_type"])):
+                sketches[key] = as_sketch(sketches.get(key), DDSketch)
+                sketches[key].add(event["response_time_ms"])
+    elif kind == "feedback":
+        if event.get("previous_score") is not None:
+            day["feedback"][feedback_rating(event["previous_score"])] -= 1
+        day["feedback"][feedback_rating(event["score"])] += 1
+
+
+def _read(path):
+    """Parse a rollups file, or return empty rollups if there is none"""
+    if not os.path.exists(path):
+        return {"version": ROLLUPS_VERSION, "days": {}}
+    with open(path, 'r') as f:
+        rollups = json.load(f)
+
+    for day in rollups["days"].values():
+        if "user_ids" in day:
+            # Rollups written before sketches listed every user id
+            users = HyperLogLog()
+            for user_id in day.pop("user_ids"):
+                users.add(user_id)
+            day["users"] = users
+        day.setdefault("latency", {"hours": {}, "types": {}})
+    return rollups
+
+
+def _encode(value):
+    """A sketch in text form, encoding it only if it was decoded"""
+    return value if isinstance(value, str) else value.to_string()
+
+
+def _write(path, rollups):
+    """Save rollups with their sketches in text form"""
+    days = {
+        name: dict(day, users=_encode(day["users"]), latency={
+            part: {key: _encode(value) for key, value in day["latency"][part].items()}
+            for part in ("hours", "types")
+        })
+        for name, day in rollups["days"].items()
+    }
+    # json.dumps uses the C encoder; json.dump to a file does not
+    atomic_write(path, json.dumps({"version": ROLLUPS_VERSION, "days": days}))
+
+
+def rollups_outdated(data_dir):
+    """Whether rollups.json is missing or was written with an older layout"""
+    path = os.path.join(data_dir, ROLLUPS_FILE)
+    if not os.path.exists(path):
+        return True
+    return _read(path).get("version") != ROLLUPS_VERSION
+
+
+def update_rollups(data_dir, events):
+    """Fold analytics events into the daily rollups with one rewrite of rollups.json"""
+    if not events:
+        return
+    path = os.path.join(data_dir, ROLLUPS_FILE)
+    with _rollups_lock:
+        rollups = _read(path)
+        for event in events:
+            apply_event(rollups, event)
+        _write(path, rollups)
+
+
+def events_from_records(sessions, interactions):
+    """Rollup events equivalent to existing session and interaction records"""
+    for session in sessions:
+        day = day_of(session["start_time"])
+        yield {"type": "session_start", "day": day, "user_id": session["user_id"]}
+        if session.get("end_time"):
+            yield {"type": "session_end", "day": day,
+                   "duration_seconds": session.get("duration_seconds") or 0}
+
+    for interaction in interactions:
+        day = day_of(interaction["timestamp"])
+        yield {"type": "interaction", "day": day, "query_type": interaction["query_type"],
+               "hour": hour_of(interaction["timestamp"]),
+               "response_time_ms": interaction.get("response_time_ms")}
+        if interaction.get("feedback_score") is not None:
+            yield {"type": "feedback", "day": day, "score": interaction["feedback_score"]}
+
+
+def _read_records(path):
+    """The records of a raw data file, or none if it doesn't exist yet"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compute_rollups(data_dir):
+    """Rollups computed from the raw sessions and interactions files, without saving them"""
+    sessions, interactions = (_read_records(os.path.join(data_dir, name)) for name in RAW_FILES)
+    rollups = {"version": ROLLUPS_VERSION, "days": {}}
+    for event in events_from_records(sessions, interactions):
+        apply_event(rollups, event)
+    return rollups
+
+
+def rebuild_rollups(data_dir):
+    """Recompute rollups.json from the raw sessions and interactions files.
+
+    Holds the rollups lock throughout, so events folded in by a concurrent
+    update_rollups are never overwritten with a count taken before them.
+    """
+    with _rollups_lock:
+        rollups = compute_rollups(data_dir)
+        _write(os.path.join(data_dir, ROLLUPS_FILE), rollups)
+    return rollups
+
+
+def load_rollups(data_dir="analytics_data"):
+    """The daily rollups, re-parsed only when rollups.json changes.
+
+    Writers backfill rollups.json when they recover a directory. Until one
+    has, a missing or outdated file would read as no activity at all, so
+    the rollups are computed from the raw files instead, again only when
+    those change. The returned dict is shared between callers and must not
+    be modified.
+    """
+    path = os.path.join(data_dir, ROLLUPS_FILE)
+    signature = file_signature(path)
+    cached = _read_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    computed = _computed_cache.get(path)
+    if computed and computed[0][0] == signature:
+        sources = (signature,) + tuple(file_signature(os.path.join(data_dir, name)) for name in RAW_FILES)
+        if computed[0] == sources:
+            return computed[1]
+
+    if signature is not None:
+        rollups = _read(path)
+        if rollups.get("version") == ROLLUPS_VERSION:
+            _read_cache[path] = (signature, rollups)
+            return rollups
+    sources = (signature,) + tuple(file_signature(os.path.join(data_dir, name)) for name in RAW_FILES)
+    rollups = compute_rollups(data_dir)
+    _computed_cache[path] = (sources, rollups)
+    return rollups
+
+
+def summarize(rollups, start_date, end_date):
+    """Key metrics, query types and feedback counts for days in [start_date, end_date].
+
+    `unique_users` is a HyperLogLog estimate merged from the daily sketches.
+    """
+    summary = empty_day()
+    users = summary.pop("users")
+    del summary["latency"]
+    day = start_date
+    while day <= end_date:
+        row = rollups["days"].get(day.isoformat())
+        day += datetime.timedelta(days=1)
+        if not row:
+            continue
+        summary["sessions"] += row["sessions"]
+        users.merge(as_sketch(row["users"], HyperLogLog))
+        summary["interactions"] += row["interactions"]
+        summary["ended_sessions"] += row["ended_sessions"]
+        summary["duration_seconds"] += row["duration_seconds"]
+        for query_type, count in row["query_types"].items():
+            summary["query_types"][query_type] = summary["query_types"].get(query_type, 0) + count
+        for rating, count in row["feedback"].items():
+            summary["feedback"][rating] += count
+
+    summary["unique_users"] = users.estimate()
+    if summary["ended_sessions"]:
+        summary["avg_duration_seconds"] = summary["duration_seconds"] / summary["ended_sessions"]
+    else:
+        summary["avg_duration_seconds"] = 0.0
+    return summary
+
+
+def latency_sketches(rollups, start_date, end_date, bucket="day", query_type=None):
+    """Merged response-time sketches per period in [start_date, end_date].
+
+    Returns a list of (period start datetime, DDSketch) for every day, or
+    every hour with `bucket="hour"`, that has response times. Days can be
+    limited to one `query_type`; hours always cover every query type.
+    """
+    if bucket == "hour" and query_type is not None:
+        raise ValueError("Hourly response times are not broken down by query type")
+
+    periods = []
+    day = start_date
+    while day <= end_date:
+        row = rollups["days"].get(day.isoformat())
+        midnight = datetime.datetime.combine(day, datetime.time())
+        day += datetime.timedelta(days=1)
+        if not row:
+            continue
+
+        latency = row["latency"]
+        if bucket == "hour":
+            for hour, value in sorted(latency["hours"].items()):
+                periods.append((midnight + datetime.timedelta(hours=int(hour)), as_sketch(value, DDSketch)))
+            continue
+
+        sketch = DDSketch()
+        for name, value in latency["types"].items():
+            if query_type is None or name == query_type:
+                sketch.merge(as_sketch(value, DDSketch))
+        if len(sketch):
+            periods.append((midnight, sketch))
+    return periods
+
+
+def latency_by_query_type(rollups, start_date, end_date):
+    """One merged response-time sketch per query type over [start_date, end_date]"""
+    sketches = {}
+    day = start_date
+    while day <= end_date:
+        row = rollups["days"].get(day.isoformat())
+        day += datetime.timedelta(days=1)
+        if not row:
+            continue
+        for name, value in row["latency"]["types"].items():
+            sketches.setdefault(name, DDSketch()).merge(as_sketch(value, DDSketch))
+    return sketches
@@ -0,0 +1,163 @@
+"""Mergeable sketches stored in the daily analytics rollups.
+
+A sketch summarizes a stream of values in a small fixed amount of space and
+can be merged with sketches of other days, so a range query is a merge of
+per-day sketches instead of a scan of the raw records.
+"""
+import base64
+import hashlib
+import math
+import zlib
+import numpy as np
+
+# HyperLogLog registers are 2**HLL_PRECISION bytes; the relative standard
+# error of the estimate is about 1.04 / sqrt(2**HLL_PRECISION), i.e. 1.6%
+HLL_PRECISION = 12
+
+
+def hash64(value):
+    """A stable 64-bit hash of a string"""
+    return int.from_bytes(hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Approximate distinct count (Flajolet et al., 2007) with linear counting
+    for small cardinalities.
+
+    Serialized as base64 of the zlib-compressed registers: a sketch of a
+    quiet day is mostly zero registers and shrinks to a few dozen bytes.
+    """
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        """An empty sketch, or one over existing registers"""
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else np.zeros(self.size, dtype=np.uint8)
+
+    def add(self, value):
+        """Count a value; adding it again changes nothing"""
+        hashed = hash64(value)
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the first 1 bit in the remaining bits
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """Estimated number of distinct values added"""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int32)).sum()
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+    def to_string(self):
+        """Compact text form for JSON files"""
+        return base64.b64encode(zlib.compress(self.registers.tobytes())).decode("ascii")
+
+    @classmethod
+    def from_string(cls, text):
+        """Rebuild a sketch written by to_string; an empty string is an empty sketch"""
+        if not text:
+            return cls()
+        registers = np.frombuffer(zlib.decompress(base64.b64decode(text)), dtype=np.uint8).copy()
+        return cls(len(registers).bit_length() - 1, registers)
+
+
+# DDSketch quantiles are within this relative error of the true value
+DDSKETCH_ACCURACY = 0.01
+
+
+class DDSketch:
+    """
+    Quantile sketch with relative-error guarantees (Masson et al., 2019).
+
+    Positive values fall into logarithmic buckets whose width grows with the
+    value, so any quantile is returned within `accuracy` of the true one,
+    e.g. 1% of 3,000 ms is 30 ms. Zeros are counted separately. Sketches
+    merge by adding bucket counts, so hourly sketches add up to daily ones.
+
+    Serialized like HyperLogLog, as base64 of zlib-compressed int64s: the
+    zero count, the lowest bucket index hit, then the counts of every bucket
+    from there to the highest one hit.
+    """
+
+    def __init__(self, accuracy=DDSKETCH_ACCURACY):
+        """An empty sketch"""
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.zeros = 0
+        self.bins = {}
+
+    def __len__(self):
+        """Number of values added"""
+        return self.zeros + sum(self.bins.values())
+
+    def add(self, value, count=1):
+        """Count a non-negative value"""
+        if value <= 0:
+            self.zeros += count
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.bins[index] = self.bins.get(index, 0) + count
+
+    def merge(self, other):
+        """Fold another sketch of the same accuracy into this one"""
+        if other.accuracy != self.accuracy:
+            raise ValueError("Cannot merge DDSketches of different accuracy")
+        self.zeros += other.zeros
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        return self
+
+    def quantile(self, q):
+        """Estimated q-quantile (0 <= q <= 1), or None for an empty sketch"""
+        total = len(self)
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+                return 2 * self.gamma ** index / (1 + self.gamma)
+        return 2 * self.gamma ** max(self.bins) / (1 + self.gamma)
+
+    def to_string(self):
+        """Compact text form for JSON files"""
+        if self.bins:
+            offset = min(self.bins)
+            counts = [self.bins.get(index, 0) for index in range(offset, max(self.bins) + 1)]
+        else:
+            offset, counts = 0, []
+        data = np.array([self.zeros, offset, *counts], dtype=np.int64)
+        return base64.b64encode(zlib.compress(data.tobytes())).decode("ascii")
+
+    @classmethod
+    def from_string(cls, text, accuracy=DDSKETCH_ACCURACY):
+        """Rebuild a sketch written by to_string; an empty string or None is an empty sketch"""
+        sketch = cls(accuracy)
+        if text:
+            data = np.frombuffer(zlib.decompress(base64.b64decode(text)), dtype=np.int64)
+            sketch.zeros = int(data[0])
+            offset = int(data[1])
+            sketch.bins = {
+                offset + int(position): int(data[2 + position])
+                for position in np.flatnonzero(data[2:])
+            }
+        return sketch
@@ -0,0 +1,30 @@
+"""Durable file writes shared by the analytics writers (log, checkpoints, rollups, response pack)."""
+import os
+
+
+def atomic_write(path, data, fsync=True):
+    """Replace a file's contents in one rename, so readers never see it half written.
+
+    `data` is bytes or str. With `fsync`, the new contents and the rename are
+    on disk when this returns, not just in the page cache.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    if fsync:
+        fsync_dir(os.path.dirname(path))
+
+
+def fsync_dir(path):
+    """Flush a directory entry change (a create, rename or unlink) to disk"""
+    fd = os.open(path or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
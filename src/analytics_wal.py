@@ -0,0 +1,547 @@
+"""Write-ahead log and checkpoints for the analytics JSON files.
+
+JSONAnalytics doesn't rewrite sessions.json, interactions.json and
+feedback.json on every call. Each change is appended as one JSON line to
+wal.jsonl in the data directory, which is cheap and can't damage the data
+files. Every SCHOOLBOT_CHECKPOINT_SECONDS a background thread folds the
+logged changes into the data files, rewriting each changed file once via a
+temporary file and an atomic rename, updates the rollups and starts a new
+log. Dashboards see new records after at most one checkpoint.
+
+How durable an acknowledged write is depends on SCHOOLBOT_WAL_FSYNC:
+
+- always: fsync the log on every write; writes queue behind each other's fsync
+- group (default): a write waits for an fsync covering its line, and one
+  fsync covers every write made while the previous one was running
+- interval: fsync every SCHOOLBOT_WAL_FSYNC_MS in the background without
+  waiting; a power cut can lose that much
+- none: leave flushing to the OS
+
+A crashed or killed process loses nothing under any policy, since each line
+is handed to the OS before the write returns. The policies only differ when
+the whole machine goes down.
+
+Each data file has a generation in generations.json, bumped around every
+write that changes records already in the file, so the dashboards' loader
+knows when appending the new records to its cached frames isn't enough.
+
+The first time a process opens a data directory, recover() removes leftover
+temporary files, salvages the complete records of a data file that no
+longer parses (keeping the original as <name>.corrupt), cuts a torn last
+line off the log, replays whatever was logged but not checkpointed and
+backfills the rollups if they are missing or outdated.
+Interactions logged with their response text are stored with a
+`response_hash` into analytics_blobs instead, and recovery moves inline
+responses of older interactions there too.
+"""
+import os
+import json
+import atexit
+import logging
+import threading
+import metrics
+from analytics_blobs import externalize, get_store
+from analytics_loader import GENERATIONS_FILE
+from analytics_rollups import day_of, hour_of, rebuild_rollups, rollups_outdated, update_rollups
+from analytics_storage import atomic_write, fsync_dir
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("always", "group", "interval", "none")
+FSYNC = os.environ.get("SCHOOLBOT_WAL_FSYNC", "group")
+FSYNC_MS = float(os.environ.get("SCHOOLBOT_WAL_FSYNC_MS", 50))
+CHECKPOINT_SECONDS = float(os.environ.get("SCHOOLBOT_CHECKPOINT_SECONDS", 1))
+
+WAL_FILE = "wal.jsonl"
+# The log a checkpoint is applying; it only outlives a checkpoint that failed
+CHECKPOINT_FILE = WAL_FILE + ".1"
+
+# Data file -> (first key of every record, whether that key is unique)
+DATA_FILES = {
+    "sessions.json": ("session_id", True),
+    "interactions.json": ("interaction_id", True),
+    "feedback.json": ("interaction_id", False),
+}
+
+_decoder = json.JSONDecoder()
+
+_logs_lock = threading.Lock()
+# absolute data_dir -> WriteAheadLog
+_logs = {}
+
+
+def _marker(key, value=None):
+    """The bytes a stored record starts with, as json.dumps writes it"""
+    marker = "{" + json.dumps(key) + ":"
+    if value is not None:
+        marker += " " + json.dumps(value)
+    return marker
+
+
+class _ArrayFile:
+    """
+    A data file being edited as bytes. New records go before the closing
+    bracket and updated records are spliced in place, so a checkpoint never
+    parses or re-encodes records it doesn't touch.
+    """
+
+    def __init__(self, path, key, unique):
+        """Read the file, or start an empty one"""
+        self.path = path
+        self.key = key
+        self.unique = unique
+        content = b"[]"
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                content = f.read()
+        self.content = content[:content.rindex(b"]")].rstrip()
+        # start offset -> [end offset, updated record]
+        self.edits = {}
+        self.appended = []
+        self.appended_by_id = {}
+        self.changed = False
+
+    def contains(self, record):
+        """Whether the file already holds this record (or, with unique keys, its id)"""
+        if self.unique:
+            record_id = record[self.key]
+            marker = _marker(self.key, record_id).encode("utf-8")
+            return record_id in self.appended_by_id or self.content.rfind(marker) >= 0
+        return record in self.appended or self.content.rfind(json.dumps(record).encode("utf-8")) >= 0
+
+    def append(self, record):
+        """Add a record at the end"""
+        self.appended.append(record)
+        if self.unique:
+            self.appended_by_id[record[self.key]] = record
+        self.changed = True
+
+    def update(self, record_id, changes):
+        """Change fields of the record with this id; returns the record as it was, or None"""
+        record = self.appended_by_id.get(record_id)
+        if record is None:
+            # Updates are nearly always to recent records, near the end
+            start = self.content.rfind(_marker(self.key, record_id).encode("utf-8"))
+            if start < 0:
+                return None
+            if start not in self.edits:
+                text = self.content[start:].decode("utf-8")
+                stored, end = _decoder.raw_decode(text)
+                self.edits[start] = [start + len(text[:end].encode("utf-8")), stored]
+            record = self.edits[start][1]
+        previous = dict(record)
+        record.update(changes)
+        self.changed = True
+        return previous
+
+    def data(self):
+        """The edited file contents"""
+        parts = []
+        position = 0
+        for start in sorted(self.edits):
+            end, record = self.edits[start]
+            parts += [self.content[position:start], json.dumps(record).encode("utf-8")]
+            position = end
+        parts.append(self.content[position:])
+        if self.appended:
+            if self.content.strip() != b"[":
+                parts.append(b", ")
+            parts.append(", ".join(json.dumps(record) for record in self.appended).encode("utf-8"))
+        parts.append(b"]")
+        return b"".join(parts)
+
+
+def _bump_generations(data_dir, names, finished):
+    """Move data files to their next odd generation before a rewrite, or the next even one after it.
+
+    Readers in analytics_loader only parse appended records incrementally
+    while a file's generation stays even and unchanged. The file only has
+    to reach other processes' page cache, not the disk: after a machine
+    crash every reader starts over, and recovery ends all rewrites.
+    """
+    path = os.path.join(data_dir, GENERATIONS_FILE)
+    generations = {}
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                generations = json.load(f)
+        except ValueError:
+            pass
+    for name in names:
+        generation = generations.get(name, 0) + 1
+        if (generation % 2 == 0) != finished:
+            generation += 1
+        generations[name] = generation
+    atomic_write(path, json.dumps(generations), fsync=False)
+
+
+def apply_ops(data_dir, ops, replay=False, fsync=True):
+    """Fold logged operations into the data files, rewriting each changed file once.
+
+    Returns the rollup events of the operations. With `replay`, records a
+    failed checkpoint already stored are not added twice.
+    """
+    files = {}
+    responses = get_store(data_dir)
+
+    def data_file(name):
+        if name not in files:
+            files[name] = _ArrayFile(os.path.join(data_dir, name), *DATA_FILES[name])
+        return files[name]
+
+    appends = {"session_start": "sessions.json", "interaction": "interactions.json", "feedback": "feedback.json"}
+    skip = set()
+    if replay:
+        # A checkpoint replaces each file in one rename, so either all of a log's
+        # new records for a file are there or none are; the last one tells which
+        last = {appends[op["op"]]: op["record"] for op in ops if op["op"] in appends}
+        skip = {name for name, record in last.items() if data_file(name).contains(record)}
+
+    events = []
+    for op in ops:
+        kind = op["op"]
+        record = op["record"]
+        if kind == "interaction":
+            record = externalize(record, responses)
+        if kind in appends and appends[kind] not in skip:
+            data_file(appends[kind]).append(record)
+
+        if kind == "session_start":
+            events.append({"type": "session_start", "day": day_of(record["start_time"]),
+                           "user_id": record["user_id"]})
+        elif kind == "session_end":
+            changes = {key: value for key, value in record.items() if key != "session_id"}
+            session = data_file("sessions.json").update(record["session_id"], changes)
+            if session is not None:
+                events.append({"type": "session_end", "day": day_of(session["start_time"]),
+                               "duration_seconds": record["duration_seconds"]})
+        elif kind == "interaction":
+            events.append({"type": "interaction", "day": day_of(record["timestamp"]),
+                           "query_type": record["query_type"], "hour": hour_of(record["timestamp"]),
+                           "response_time_ms": record["response_time_ms"]})
+        elif kind == "feedback":
+            interaction = data_file("interactions.json").update(
+                record["interaction_id"], {"feedback_score": record["feedback_score"]}
+            )
+            if interaction is not None:
+                events.append({"type": "feedback", "day": day_of(interaction["timestamp"]),
+                               "score": record["feedback_score"],
+                               "previous_score": interaction["feedback_score"]})
+
+    # Responses must be on disk before the interactions that refer to them
+    if fsync:
+        responses.sync()
+    # Appends alone leave the generation as is, so readers keep parsing incrementally
+    rewritten = [name for name, data in files.items() if data.edits]
+    if rewritten:
+        _bump_generations(data_dir, rewritten, finished=False)
+    for data in files.values():
+        if data.changed:
+            atomic_write(data.path, data.data(), fsync)
+    if rewritten:
+        _bump_generations(data_dir, rewritten, finished=True)
+    return events
+
+
+def read_log(path):
+    """The operations in a log file, cutting off a torn last line left by a crash"""
+    ops = []
+    complete = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                break
+            complete += len(line)
+        size = f.seek(0, os.SEEK_END)
+    if complete < size:
+        logger.warning("Cutting %d bytes of torn log tail off %s", size - complete, path)
+        os.truncate(path, complete)
+    return ops
+
+
+def salvage(content, key):
+    """The complete records in a damaged data file, skipping anything that doesn't parse"""
+    text = content.decode("utf-8", errors="replace")
+    marker = _marker(key)
+    records = []
+    position = text.find(marker)
+    while position >= 0:
+        try:
+            record, end = _decoder.raw_decode(text, position)
+        except ValueError:
+            position = text.find(marker, position + 1)
+            continue
+        records.append(record)
+        position = text.find(marker, end)
+    return records
+
+
+def _repair(path, key, fsync):
+    """Salvage a data file that doesn't parse; returns whether it had to"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    try:
+        json.loads(content)
+        return False
+    except ValueError:
+        pass
+
+    records = salvage(content, key)
+    backup = f"{path}.corrupt"
+    os.replace(path, backup)
+    atomic_write(path, json.dumps(records), fsync)
+    logger.warning("Salvaged %d records from damaged %s; the original is in %s",
+                   len(records), path, backup)
+    return True
+
+
+def _externalize_responses(data_dir, fsync):
+    """Move inline response texts of older interactions into the blob store; returns whether there were any"""
+    path = os.path.join(data_dir, "interactions.json")
+    if not os.path.exists(path):
+        return False
+    with open(path, 'rb') as f:
+        content = f.read()
+    # Can only match a key: quotes inside JSON strings are escaped
+    if b'"response": ' not in content:
+        return False
+
+    responses = get_store(data_dir)
+    interactions = [externalize(record, responses) for record in json.loads(content)]
+    if fsync:
+        responses.sync()
+    atomic_write(path, json.dumps(interactions), fsync)
+    logger.info("Moved the responses of %d interactions in %s to %s",
+                len(interactions), data_dir, responses.path)
+    return True
+
+
+def _replay(data_dir, path, fsync):
+    """Apply a log file left behind by a crash or a failed checkpoint, then remove it"""
+    ops = read_log(path)
+    apply_ops(data_dir, ops, replay=True, fsync=fsync)
+    os.remove(path)
+    if fsync:
+        fsync_dir(data_dir)
+    return len(ops)
+
+
+def recover(data_dir, fsync=True):
+    """Make a data directory consistent again after a crash.
+
+    Returns the names of repaired files and the number of operations replayed.
+    """
+    # Salvaging, moving responses out and replaying may all change stored records
+    _bump_generations(data_dir, DATA_FILES, finished=False)
+    for name in os.listdir(data_dir):
+        if name.endswith(".tmp"):
+            os.remove(os.path.join(data_dir, name))
+
+    repaired = [
+        name for name, (key, _) in DATA_FILES.items()
+        if os.path.exists(os.path.join(data_dir, name)) and _repair(os.path.join(data_dir, name), key, fsync)
+    ]
+
+    _externalize_responses(data_dir, fsync)
+
+    replayed = 0
+    for name in (CHECKPOINT_FILE, WAL_FILE):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            replayed += _replay(data_dir, path, fsync)
+
+    # Also backfills rollups that are missing or have an older layout. This
+    # runs before the checkpoint thread starts, so no update can interleave.
+    try:
+        rollups_stale = rollups_outdated(data_dir)
+    except ValueError:
+        rollups_stale = True
+    if repaired or replayed or rollups_stale:
+        rebuild_rollups(data_dir)
+    _bump_generations(data_dir, DATA_FILES, finished=True)
+    if replayed:
+        logger.info("Replayed %d logged analytics writes in %s", replayed, data_dir)
+    return {"repaired": repaired, "replayed": replayed}
+
+
+class WriteAheadLog:
+    """
+    The write-ahead log of one data directory, shared by every session in the
+    process. Writers call append(); background threads checkpoint and, with
+    the interval policy, fsync.
+    """
+
+    def __init__(self, data_dir, fsync=FSYNC, fsync_ms=FSYNC_MS, checkpoint_seconds=CHECKPOINT_SECONDS):
+        """Recover the data directory, then open a fresh log in it"""
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {', '.join(FSYNC_POLICIES)}")
+        self.data_dir = data_dir
+        self.fsync = fsync
+        self.durable = fsync != "none"
+        self.path = os.path.join(data_dir, WAL_FILE)
+        self.recovery = recover(data_dir, self.durable)
+
+        self._lock = threading.Lock()
+        self._synced_changed = threading.Condition(self._lock)
+        self._checkpoint_lock = threading.Lock()
+        self._file = open(self.path, 'ab')
+        # Operations logged since the last checkpoint
+        self._pending = []
+        # Appends written to the log and known to be on disk, counted since startup
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._every, args=(checkpoint_seconds, self.checkpoint),
+                                          name="analytics-checkpoint", daemon=True)]
+        if fsync == "interval":
+            self._threads.append(threading.Thread(target=self._every, args=(fsync_ms / 1000, self.sync),
+                                                  name="analytics-wal-fsync", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def append(self, ops):
+        """Log operations; returns once they are as durable as the fsync policy promises"""
+        data = "".join(json.dumps(op) + "\n" for op in ops).encode("utf-8")
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            self._pending.extend(ops)
+            self._written += 1
+            position = self._written
+            if self.fsync == "always":
+                self._fsync(self._file)
+                self._synced = position
+        if self.fsync == "group":
+            self.sync(position)
+
+    def sync(self, position=None):
+        """Wait until the log is on disk up to `position` (default: all of it).
+
+        The first caller to find no fsync running does one for everything
+        written so far; the rest wait for it and usually find themselves covered.
+        """
+        with self._lock:
+            if position is None:
+                position = self._written
+            while self._synced < position:
+                if not self._syncing:
+                    break
+                self._synced_changed.wait()
+            else:
+                return
+            self._syncing = True
+            target = self._written
+            log_file = self._file
+        try:
+            self._fsync(log_file)
+        finally:
+            with self._lock:
+                self._syncing = False
+                self._synced = max(self._synced, target)
+                self._synced_changed.notify_all()
+
+    def checkpoint(self):
+        """Fold everything logged so far into the data files and rollups; returns the operations applied"""
+        with self._checkpoint_lock:
+            rotated = os.path.join(self.data_dir, CHECKPOINT_FILE)
+            if os.path.exists(rotated):
+                # Left by a checkpoint that failed part way
+                _replay(self.data_dir, rotated, self.durable)
+                rebuild_rollups(self.data_dir)
+
+            ops = self._rotate(rotated)
+            if not ops:
+                return 0
+            with metrics.timer("schoolbot_analytics_checkpoint_seconds"):
+                events = apply_ops(self.data_dir, ops, fsync=self.durable)
+                update_rollups(self.data_dir, events)
+                os.remove(rotated)
+            return len(ops)
+
+    def close(self):
+        """Stop the background threads and checkpoint what is left"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self.checkpoint()
+        with self._lock:
+            self._file.close()
+
+    def _rotate(self, rotated):
+        """Move the current log aside for a checkpoint and start a new one; returns its operations"""
+        with self._lock:
+            # Nothing to fold into a directory that has been deleted, e.g. a test's temporary one
+            if not self._pending or not os.path.isdir(self.data_dir):
+                return []
+            # The log file can't be closed under a running fsync
+            while self._syncing:
+                self._synced_changed.wait()
+            if self.durable:
+                self._fsync(self._file)
+            self._file.close()
+            os.replace(self.path, rotated)
+            self._file = open(self.path, 'ab')
+            if self.durable:
+                fsync_dir(self.data_dir)
+            self._synced = self._written
+            self._synced_changed.notify_all()
+            ops, self._pending = self._pending, []
+        return ops
+
+    def _fsync(self, log_file):
+        """fsync the log file, timing it"""
+        with metrics.timer("schoolbot_wal_fsync_seconds"):
+            os.fsync(log_file.fileno())
+
+    def _every(self, seconds, action):
+        """Run `action` every `seconds` until closed"""
+        while not self._stop.wait(seconds):
+            try:
+                action()
+            except Exception:
+                logger.exception("Analytics write-ahead log %s failed in %s", action.__name__, self.data_dir)
+
+
+def get_log(data_dir="analytics_data"):
+    """The process's log for a data directory, recovering the directory on first use"""
+    key = os.path.abspath(data_dir)
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = _logs[key] = WriteAheadLog(data_dir)
+    return log
+
+
+def close_log(data_dir="analytics_data"):
+    """Checkpoint and close the process's log for a data directory, if it has one.
+
+    For code that deletes the directory afterwards, such as benchmarks using
+    a temporary one; the next get_log() for it opens a fresh log.
+    """
+    with _logs_lock:
+        log = _logs.pop(os.path.abspath(data_dir), None)
+    if log is not None:
+        log.close()
+
+
+def checkpoint_all():
+    """Checkpoint every open log whose directory still exists, e.g. when the process exits"""
+    with _logs_lock:
+        logs = list(_logs.values())
+    for log in logs:
+        if not os.path.isdir(log.data_dir):
+            continue
+        try:
+            log.checkpoint()
+        except OSError:
+            logger.exception("Final analytics checkpoint failed in %s", log.data_dir)
+
+
+# Registered at import, so it runs after exit handlers that still log writes
+atexit.register(checkpoint_all)
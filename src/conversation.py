@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import gzip
+import threading
+import weakref
+
+
+def _message_size(message):
+    """Approximate bytes held by one message: its dict and content.
+
+    The role is one of a few strings shared by every message, so it isn't
+    counted against any of them.
+    """
+    return sys.getsizeof(message) + sys.getsizeof(message["content"])
+
+
+def _remove_file(path):
+    """Delete a spill file if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ConversationHistory:
+    """
+    The chat messages of one browser session.
+
+    Recent messages stay in memory; older ones can be spilled to a gzipped
+    JSON-lines file and are read back only when someone scrolls to them or
+    the full conversation is sent to the model. Messages are addressed by
+    their position in the conversation (the system prompt is not counted),
+    which never changes because the history is append-only.
+    """
+
+    def __init__(self, system_prompt, session_id, spill_dir="session_spill"):
+        """Start an empty conversation for a session"""
+        self.session_id = session_id
+        self.spill_path = os.path.join(spill_dir, f"{session_id}.jsonl.gz")
+        self._system = {"role": "system", "content": system_prompt}
+        self._lock = threading.Lock()
+        self._recent = []
+        self._spilled = 0
+        self._recent_bytes = 0
+
+        os.makedirs(spill_dir, exist_ok=True)
+        # Remove the spill file once the session's state is garbage collected
+        weakref.finalize(self, _remove_file, self.spill_path)
+
+    def __len__(self):
+        """Number of user and assistant messages, including spilled ones"""
+        return self._spilled + len(self._recent)
+
+    @property
+    def spilled_count(self):
+        """Number of messages currently stored on disk"""
+        return self._spilled
+
+    def append(self, role, content):
+        """Add a message to the end of the conversation"""
+        message = {"role": role, "content": content}
+        with self._lock:
+            self._recent.append(message)
+            self._recent_bytes += _message_size(message)
+
+    def recent(self, count):
+        """The last `count` messages, oldest first"""
+        with self._lock:
+            if count <= len(self._recent):
+                return list(self._recent[-count:])
+        return self.messages(max(0, len(self) - count), len(self))
+
+    def messages(self, start, stop):
+        """Messages [start, stop) by position, reading spilled ones from disk"""
+        with self._lock:
+            if start >= self._spilled:
+                return list(self._recent[start - self._spilled:stop - self._spilled])
+            spilled = self._read_spilled()
+            return (spilled + self._recent)[start:stop]
+
+    def for_model(self):
+        """The system prompt plus the whole conversation, as sent to OpenAI"""
+        with self._lock:
+            spilled = self._read_spilled() if self._spilled else []
+            return [self._system] + spilled + self._recent
+
+    def nbytes(self):
+        """Approximate bytes of conversation state kept in memory"""
+        return sys.getsizeof(self._recent) + self._recent_bytes
+
+    def spill(self, keep_last):
+        """Move all but the last `keep_last` in-memory messages to disk.
+
+        Returns the number of messages written.
+        """
+        with self._lock:
+            cold = self._recent[:max(0, len(self._recent) - keep_last)]
+            if not cold:
+                return 0
+
+            # Appending a new gzip member keeps earlier spills intact
+            with gzip.open(self.spill_path, 'at', encoding='utf-8') as f:
+                for message in cold:
+                    f.write(json.dumps(message, separators=(',', ':')) + "\n")
+
+            self._spilled += len(cold)
+            self._recent = self._recent[len(cold):]
+            self._recent_bytes = sum(_message_size(m) for m in self._recent)
+            return len(cold)
+
+    def _read_spilled(self):
+        """Load the spilled messages; the caller holds the lock"""
+        if not self._spilled:
+            return []
+        with gzip.open(self.spill_path, 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
@@ -0,0 +1,199 @@
+"""Process metrics in Prometheus text format.
+
+Counters and histograms are kept in memory and exported either over HTTP
+on a local port (SCHOOLBOT_METRICS_PORT, scraped at /metrics) or as a file
+rewritten every SCHOOLBOT_METRICS_INTERVAL seconds (SCHOOLBOT_METRICS_FILE,
+e.g. for node_exporter's textfile collector). With neither set, every call
+returns immediately and timers are a shared no-op.
+
+    with metrics.timer("schoolbot_chat_stage_seconds", stage="upstream"):
+        ...
+    metrics.inc("schoolbot_chat_turns_total")
+"""
+import os
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+PORT = int(os.environ.get("SCHOOLBOT_METRICS_PORT", 0))
+HOST = os.environ.get("SCHOOLBOT_METRICS_HOST", "127.0.0.1")
+FILE = os.environ.get("SCHOOLBOT_METRICS_FILE", "")
+INTERVAL = float(os.environ.get("SCHOOLBOT_METRICS_INTERVAL", 15))
+ENABLED = bool(PORT or FILE)
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HELP = {
+    "schoolbot_chat_turns_total": "Chat messages answered",
+    "schoolbot_chat_errors_total": "Chat messages that failed upstream",
+    "schoolbot_chat_stage_seconds": "Time spent in each stage of a chat turn",
+    "schoolbot_tokens_total": "Tokens reported by the API",
+    "schoolbot_wal_fsync_seconds": "Time spent in each fsync of the analytics write-ahead log",
+    "schoolbot_analytics_checkpoint_seconds": "Time spent folding the write-ahead log into the analytics files",
+}
+
+_lock = threading.Lock()
+# (name, sorted label items) -> value
+_counters = {}
+# (name, sorted label items) -> [bucket counts..., +Inf count, sum]
+_histograms = {}
+_started = False
+
+
+def inc(name, amount=1, **labels):
+    """Add to a counter"""
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    """Record one value in a histogram"""
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        counts = _histograms.get(key)
+        if counts is None:
+            counts = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for position, bound in enumerate(BUCKETS):
+            if value <= bound:
+                counts[position] += 1
+        counts[-2] += 1
+        counts[-1] += value
+
+
+class _Timer:
+    """Context manager observing its elapsed seconds into a histogram"""
+
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+class _NoopTimer:
+    """Stand-in for _Timer when metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NOOP = _NoopTimer()
+
+
+def timer(name, **labels):
+    """Time a block into a histogram of seconds"""
+    if not ENABLED:
+        return _NOOP
+    return _Timer(name, labels)
+
+
+def _format_labels(labels, extra=()):
+    """{a="1",b="2"} for a metric line, or nothing without labels"""
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def render():
+    """All metrics in Prometheus text exposition format"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(counts) for key, counts in _histograms.items()}
+
+    lines = []
+    described = set()
+
+    def describe(name, kind):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        describe(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), counts in sorted(histograms.items()):
+        describe(name, "histogram")
+        for bound, count in zip(BUCKETS, counts):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {counts[-2]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {counts[-2]}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {counts[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves render() at /metrics"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_file(path=FILE):
+    """Replace the metrics file with the current metrics in one atomic rename"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(render())
+    os.replace(temp_path, path)
+
+
+def start():
+    """Start exporting, once per process; does nothing when metrics are disabled"""
+    global _started
+    if not ENABLED:
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+
+    if PORT:
+        try:
+            server = ThreadingHTTPServer((HOST, PORT), _Handler)
+        except OSError:
+            logger.exception("Could not serve metrics on %s:%s", HOST, PORT)
+        else:
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+    if FILE:
+        def run():
+            while True:
+                try:
+                    write_file()
+                except OSError:
+                    logger.exception("Could not write metrics file %s", FILE)
+                time.sleep(INTERVAL)
+
+        threading.Thread(target=run, name="metrics-file", daemon=True).start()
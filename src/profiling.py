@@ -0,0 +1,130 @@
+"""Opt-in cProfile sampling of Streamlit reruns.
+
+Wrap a rerun in `profiled(name)` and a fraction SCHOOLBOT_PROFILE_RATE of
+reruns (e.g. 0.01 for 1%) is run under cProfile. Fragment bodies are
+decorated with `profiled_fragment(name)` instead, so their own reruns are
+sampled the same way. A rerun whose URL has
+?profile=<SCHOOLBOT_PROFILE_TOKEN> is always profiled, so a slow page can
+be captured on demand without redeploying. Each profile is written to
+SCHOOLBOT_PROFILE_DIR as a .prof file (for pstats or snakeviz) plus a .txt
+summary of the top functions by cumulative time.
+
+Overhead stays bounded: at most SCHOOLBOT_PROFILE_MAX_PER_MINUTE profiles
+are taken per process per minute, only one rerun is profiled at a time,
+and only the newest SCHOOLBOT_PROFILE_KEEP profiles are kept on disk.
+With the rate at 0 and no token set, profiled() costs one comparison.
+"""
+import io
+import os
+import re
+import time
+import glob
+import pstats
+import random
+import cProfile
+import datetime
+import logging
+import functools
+import threading
+import contextlib
+
+logger = logging.getLogger(__name__)
+
+RATE = float(os.environ.get("SCHOOLBOT_PROFILE_RATE", 0))
+TOKEN = os.environ.get("SCHOOLBOT_PROFILE_TOKEN", "")
+PROFILE_DIR = os.environ.get("SCHOOLBOT_PROFILE_DIR", "profiles")
+MAX_PER_MINUTE = int(os.environ.get("SCHOOLBOT_PROFILE_MAX_PER_MINUTE", 6))
+TOP_N = int(os.environ.get("SCHOOLBOT_PROFILE_TOP", 30))
+KEEP = int(os.environ.get("SCHOOLBOT_PROFILE_KEEP", 100))
+
+# Held while a rerun is being profiled; others run unprofiled meanwhile
+_active = threading.Lock()
+# Start times of the profiles taken in the last minute
+_recent = []
+_recent_lock = threading.Lock()
+
+
+def should_profile(token=None):
+    """Whether this rerun is sampled (or requested with the token) and within the rate limit"""
+    requested = bool(TOKEN) and token == TOKEN
+    if not requested and (RATE <= 0 or random.random() >= RATE):
+        return False
+
+    now = time.monotonic()
+    with _recent_lock:
+        _recent[:] = [started for started in _recent if now - started < 60]
+        if len(_recent) >= MAX_PER_MINUTE:
+            return False
+        _recent.append(now)
+    return True
+
+
+@contextlib.contextmanager
+def profiled(name, token=None):
+    """Run the block under cProfile if this rerun is sampled; see the module docstring"""
+    # A block nested in a profiled one (a fragment during its page's rerun) is already covered
+    if not (RATE > 0 or TOKEN) or _active.locked() or not should_profile(token) \
+            or not _active.acquire(blocking=False):
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        # Also reached through st.stop() and st.rerun(), which raise
+        profiler.disable()
+        _active.release()
+        try:
+            write_profile(name, profiler, time.perf_counter() - start)
+        except OSError:
+            logger.exception("Could not write profile for %s", name)
+
+
+def profiled_fragment(name):
+    """Decorator for an st.fragment's function: profile its fragment reruns like a page's rerun.
+
+    Goes under @st.fragment. When the whole page reruns, the fragment is
+    part of the page's own profiled() block and isn't sampled again.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            import streamlit as st
+            from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+            ctx = get_script_run_ctx()
+            if not (RATE > 0 or TOKEN) or ctx is None or not ctx.fragment_ids_this_run:
+                return func(*args, **kwargs)
+            with profiled(name, token=st.query_params.get("profile")):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def write_profile(name, profiler, seconds, profile_dir=PROFILE_DIR):
+    """Save a profile and its top-N summary; returns the .prof path"""
+    os.makedirs(profile_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    base = os.path.join(profile_dir, f"{stamp}_{re.sub(r'[^A-Za-z0-9]+', '-', name).strip('-')}")
+    profiler.dump_stats(base + ".prof")
+
+    summary = io.StringIO()
+    summary.write(f"{name}: {seconds * 1000:.1f} ms wall time\n")
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(TOP_N)
+    with open(base + ".txt", 'w') as f:
+        f.write(summary.getvalue())
+
+    prune(profile_dir)
+    return base + ".prof"
+
+
+def prune(profile_dir=PROFILE_DIR, keep=KEEP):
+    """Delete all but the newest `keep` profiles and their summaries"""
+    profiles = sorted(glob.glob(os.path.join(profile_dir, "*.prof")))
+    for path in profiles[:max(0, len(profiles) - keep)]:
+        for old in (path, path[:-len(".prof")] + ".txt"):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(old)
@@ -0,0 +1,165 @@
+import os
+import time
+import atexit
+import datetime
+import logging
+import threading
+import weakref
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Per-session and process-wide limits on in-memory conversation state, in bytes
+SESSION_MEMORY_CAP = int(os.environ.get("SCHOOLBOT_SESSION_MEMORY_CAP", 256 * 1024))
+TOTAL_MEMORY_CAP = int(os.environ.get("SCHOOLBOT_TOTAL_MEMORY_CAP", 64 * 1024 * 1024))
+
+# Messages always kept in memory when a history is spilled
+KEEP_IN_MEMORY = 20
+
+# Seconds without a rerun before a session's analytics session is ended,
+# and how often the background reaper looks for such sessions
+IDLE_TIMEOUT = int(os.environ.get("SCHOOLBOT_IDLE_TIMEOUT", 30 * 60))
+REAP_INTERVAL = int(os.environ.get("SCHOOLBOT_REAP_INTERVAL", 60))
+
+
+class SessionRegistry:
+    """
+    Process-wide record of live chat sessions: their last activity and the
+    conversation state they hold in memory.
+
+    Every rerun sends a heartbeat. A session over its own memory cap has its
+    cold history spilled right away; when the total goes over the process cap,
+    the least recently active sessions are spilled first. A background reaper
+    ends the analytics session of anyone idle for longer than `idle_timeout`,
+    writing all of those session ends in one batch. Histories are held by weak
+    reference, so a session Streamlit has discarded drops out of the memory
+    accounting on its own.
+    """
+
+    def __init__(self, session_cap=SESSION_MEMORY_CAP, total_cap=TOTAL_MEMORY_CAP,
+                 keep_in_memory=KEEP_IN_MEMORY, idle_timeout=IDLE_TIMEOUT):
+        """Create an empty registry with the given caps"""
+        self.session_cap = session_cap
+        self.total_cap = total_cap
+        self.keep_in_memory = keep_in_memory
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._stop = threading.Event()
+
+    def heartbeat(self, history, analytics):
+        """Record that a session is still active"""
+        with self._lock:
+            self._sessions[history.session_id] = {
+                "history": weakref.ref(history),
+                "analytics": analytics,
+                "last_seen": time.time(),
+            }
+
+    def track(self, history, analytics):
+        """Heartbeat for a session and enforce the memory caps"""
+        self.heartbeat(history, analytics)
+
+        if history.nbytes() > self.session_cap:
+            history.spill(self.keep_in_memory)
+        self._enforce_total_cap()
+
+    def usage(self):
+        """Memory use per live session, largest first"""
+        rows = []
+        with self._lock:
+            for session_id, entry in self._sessions.items():
+                history = entry["history"]()
+                if history is None:
+                    # Left for the reaper, which still has to end its analytics session
+                    continue
+                rows.append({
+                    "session_id": session_id,
+                    "bytes": history.nbytes(),
+                    "messages": len(history),
+                    "spilled_messages": history.spilled_count,
+                    "last_seen": entry["last_seen"],
+                })
+        return sorted(rows, key=lambda row: row["bytes"], reverse=True)
+
+    def reap(self, idle_timeout=None):
+        """End the analytics sessions of everyone idle past the timeout.
+
+        Each session is closed as of its last heartbeat, its conversation is
+        spilled to disk, and all session ends are saved with one write per
+        analytics data directory. Returns the number of sessions ended.
+        """
+        if idle_timeout is None:
+            idle_timeout = self.idle_timeout
+        cutoff = time.time() - idle_timeout
+
+        with self._lock:
+            idle = {
+                session_id: entry for session_id, entry in self._sessions.items()
+                if entry["last_seen"] <= cutoff
+            }
+            for session_id in idle:
+                del self._sessions[session_id]
+
+        session_ends = {}
+        for entry in idle.values():
+            analytics = entry["analytics"]
+            last_seen = datetime.datetime.fromtimestamp(entry["last_seen"])
+            session_end = analytics.finish_session(end_time=last_seen)
+            if session_end:
+                session_ends.setdefault(analytics.data_dir, (analytics, []))[1].append(session_end)
+
+            history = entry["history"]()
+            if history is not None:
+                history.spill(0)
+
+        for analytics, ends in session_ends.values():
+            analytics.end_sessions(ends)
+        return sum(len(ends) for _, ends in session_ends.values())
+
+    def start_reaper(self, interval=REAP_INTERVAL):
+        """Run `reap` every `interval` seconds on a daemon thread"""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.reap()
+                except Exception:
+                    logger.exception("Idle-session reaper failed")
+
+        thread = threading.Thread(target=run, name="session-reaper", daemon=True)
+        thread.start()
+        return thread
+
+    def close_all(self):
+        """Stop the reaper and end every remaining session, e.g. at process exit"""
+        self._stop.set()
+        return self.reap(idle_timeout=-1)
+
+    def _enforce_total_cap(self):
+        """Spill the coldest sessions until the process is back under its cap"""
+        rows = self.usage()
+        total = sum(row["bytes"] for row in rows)
+        if total <= self.total_cap:
+            return
+
+        for row in sorted(rows, key=lambda row: row["last_seen"]):
+            with self._lock:
+                entry = self._sessions.get(row["session_id"])
+                history = entry["history"]() if entry else None
+            if history is None:
+                continue
+            before = history.nbytes()
+            history.spill(self.keep_in_memory)
+            total -= before - history.nbytes()
+            if total <= self.total_cap:
+                break
+
+
+@st.cache_resource
+def get_registry():
+    """The registry shared by every session in this process"""
+    registry = SessionRegistry()
+    registry.start_reaper()
+    # Close whatever is still open when the server shuts down
+    atexit.register(registry.close_all)
+    return registry
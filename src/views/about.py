@@ -0,0 +1,76 @@
+# Fair Use Notice: This educational project uses concepts from academic sources
+# under Fair Use (17 U.S.C. § 107) for nonprofit educational purposes.
+# Full details: https://github.com/Noah-Banjo/lr-schoolbot/blob/main/README.md
+#
+# About page: static project description, no OpenAI or analytics
+
+from views.static import content_version, render_static
+
+# Page content, in order; each entry was once its own st.markdown call
+SECTIONS = [
+    '<p class="big-font">About LR SchoolBot 🤖</p>',
+
+    """
+    <div class="about-section">
+    <h3>👋 Meet Your Educational Guide!</h3>
+    
+    I'm LR SchoolBot, your friendly guide to exploring the rich educational heritage of Little Rock! 
+    I'm here to share stories, facts, and history about two incredible schools that have shaped 
+    our community: Central High School and Dunbar High School.
+    
+    <h3>🎯 My Purpose</h3>
+    <ul>
+    <li>Share the amazing history of both schools based on real academic sources</li>
+    <li>Help people learn about educational excellence and civil rights history</li>
+    <li>Connect you with historical resources and authentic information</li>
+    <li>Make learning history fun and interactive!</li>
+    </ul>
+    
+    <h3>🎓 My Knowledge</h3>
+    My expertise comes from two carefully selected scholarly works:
+    <ul>
+    <li><strong>Dunbar High School:</strong> Jones-Wilson's research on educational excellence and community impact</li>
+    <li><strong>Central High School:</strong> Elizabeth Huckaby's firsthand account as vice principal during the 1957 integration crisis</li>
+    </ul>
+    
+    These real academic sources provide authentic insights into both schools' unique contributions 
+    to Little Rock's educational landscape.
+    
+    <h3>📚 Research Foundation</h3>
+    This project demonstrates how AI can help make archival research and educational heritage 
+    more accessible while maintaining academic integrity. It's part of the broader ArchivAI 
+    research initiative exploring responsible AI applications in digital preservation and 
+    historical education.
+    
+    <h3>🔍 Academic Approach</h3>
+    <ul>
+    <li>Based on verified scholarly sources from the 1980s</li>
+    <li>Combines primary source material (Huckaby's diary) with academic research (Jones-Wilson)</li>
+    <li>Maintains historical accuracy while making information accessible</li>
+    <li>Demonstrates ethical use of AI in educational contexts</li>
+    </ul>
+    
+    <h3>⚖️ Fair Use and Educational Mission</h3>
+    This project operates under Fair Use principles for nonprofit educational purposes. 
+    It transforms academic research into an interactive educational tool while:
+    <ul>
+    <li>Maintaining proper academic attribution</li>
+    <li>Encouraging engagement with original scholarship</li>
+    <li>Creating transformative educational experiences</li>
+    <li>Supporting preservation of local cultural heritage</li>
+    </ul>
+    
+    <h3>💝 Special Thanks</h3>
+    This project was created to help preserve and share Little Rock's educational heritage with 
+    new generations. Special thanks to the scholars whose work makes projects like this possible, 
+    and to all the historians, educators, and community members who have helped preserve these 
+    important stories.
+    </div>
+    """,
+]
+VERSION = content_version(SECTIONS)
+
+
+def render():
+    """Render the About page"""
+    render_static("about", SECTIONS, VERSION)
@@ -0,0 +1,309 @@
+# Fair Use Notice: This educational project uses concepts from academic sources
+# under Fair Use (17 U.S.C. § 107) for nonprofit educational purposes.
+# Full details: https://github.com/Noah-Banjo/lr-schoolbot/blob/main/README.md
+#
+# Chat page: the only page that needs the OpenAI client and analytics
+
+import os
+import datetime
+import streamlit as st
+import metrics
+import profiling
+from prompts import SYSTEM_PROMPT
+from analytics import JSONAnalytics
+from conversation import ConversationHistory
+from session_registry import get_registry
+
+# Number of conversation turns shown before "Load older messages"
+HISTORY_PAGE_SIZE = 10
+
+# Enhanced JavaScript for Enter key handling
+ENTER_KEY_SCRIPT = """
+<script>
+document.addEventListener('DOMContentLoaded', function() {
+    function addEnterKeyListener() {
+        const textArea = document.querySelector('textarea[aria-label="What would you like to know? 🤔"]');
+        if (textArea && !textArea.hasAttribute('data-enter-listener')) {
+            textArea.setAttribute('data-enter-listener', 'true');
+            textArea.addEventListener('keydown', function(e) {
+                if (e.key === 'Enter' && !e.shiftKey) {
+                    e.preventDefault();
+                    const submitButton = document.querySelector('button[kind="primary"]');
+                    if (submitButton) {
+                        submitButton.click();
+                    }
+                }
+            });
+        }
+    }
+    
+    // Add listener initially
+    addEnterKeyListener();
+    
+    // Re-add listener after page updates (Streamlit re-renders)
+    const observer = new MutationObserver(function(mutations) {
+        addEnterKeyListener();
+    });
+    
+    observer.observe(document.body, {
+        childList: true,
+        subtree: true
+    });
+});
+</script>
+"""
+
+
+@st.cache_resource
+def _create_client(api_key):
+    """One OpenAI client per API key, shared by every session"""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+
+def load_client():
+    """Return the OpenAI client, with fallback for both Railway and Streamlit"""
+    # Try multiple sources for API key
+    api_key = None
+    
+    # First try environment variable (Railway)
+    if os.environ.get("OPENAI_API_KEY"):
+        api_key = os.environ.get("OPENAI_API_KEY")
+    
+    # Then try Streamlit secrets (Streamlit Cloud)
+    elif hasattr(st, 'secrets') and "OPENAI_API_KEY" in st.secrets:
+        api_key = st.secrets["OPENAI_API_KEY"]
+    
+    if not api_key:
+        st.error("⚠️ OpenAI API key not found! Please add OPENAI_API_KEY to environment variables or Streamlit secrets.")
+        st.stop()
+
+    try:
+        return _create_client(api_key)
+    except ImportError:
+        st.error("OpenAI library not found. Please install: pip install openai")
+        st.stop()
+    except Exception as e:
+        st.error(f"Error initializing OpenAI client: {str(e)}")
+        st.stop()
+
+
+def init_chat_state():
+    """Set up conversation and analytics state the first time the chat is opened"""
+    # Initialize analytics tracking
+    if 'analytics' not in st.session_state:
+        st.session_state.analytics = JSONAnalytics()
+        # Start a new session
+        st.session_state.analytics.start_session()
+        st.session_state.last_interaction_id = None
+    else:
+        resume_session()
+
+    # Conversation history, kept under the session memory cap
+    if 'history' not in st.session_state:
+        st.session_state.history = ConversationHistory(
+            SYSTEM_PROMPT,
+            session_id=st.session_state.analytics.session_id
+        )
+
+    # Chat history pagination
+    if 'history_pages' not in st.session_state:
+        st.session_state.history_pages = 1
+
+
+def resume_session():
+    """Start a new analytics session if the idle-session reaper ended the last one.
+
+    Called from the chat fragment as well as on full reruns, since a student
+    coming back after the idle timeout usually just sends another message.
+    """
+    analytics = st.session_state.analytics
+    if analytics.session_id is None:
+        analytics.start_session()
+        st.session_state.last_interaction_id = None
+
+
+def usage_counts(usage):
+    """Token counts from an API usage object, as plain ints"""
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens,
+        "cached_tokens": getattr(details, "cached_tokens", None),
+    }
+
+
+def get_assistant_response(messages, user_input):
+    """Get response from OpenAI API"""
+    start_time = datetime.datetime.now()
+    
+    try:
+        with metrics.timer("schoolbot_chat_stage_seconds", stage="upstream"):
+            response = load_client().chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                temperature=0.8,
+                presence_penalty=0.6,
+                frequency_penalty=0.3
+            )
+        response_text = response.choices[0].message.content
+        usage = usage_counts(response.usage)
+        if usage:
+            metrics.inc("schoolbot_tokens_total", usage["prompt_tokens"], kind="prompt")
+            metrics.inc("schoolbot_tokens_total", usage["completion_tokens"], kind="completion")
+        
+        # Record when processing finished
+        end_time = datetime.datetime.now()
+        
+        # Track this interaction
+        if 'analytics' in st.session_state:
+            interaction_id = st.session_state.analytics.track_interaction(
+                query=user_input,
+                response=response_text,
+                start_time=start_time,
+                end_time=end_time,
+                model=response.model,
+                usage=usage
+            )
+            # Store for potential feedback
+            st.session_state.last_interaction_id = interaction_id
+            
+        return response_text
+    except Exception as e:
+        metrics.inc("schoolbot_chat_errors_total")
+        st.error(f"Error: {str(e)}")
+        return None
+
+
+@st.fragment
+@profiling.profiled_fragment("chat feedback")
+def feedback_widget():
+    """Feedback buttons for the last answer, rerun on their own when clicked"""
+    if not st.session_state.get('last_interaction_id'):
+        return
+
+    st.markdown("### Was this helpful?")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        clicked_yes = st.button("👍 Yes, thanks!")
+    with col3:
+        clicked_no = st.button("👎 Not really")
+
+    if clicked_yes or clicked_no:
+        analytics = st.session_state.analytics
+        analytics.track_feedback(
+            st.session_state.last_interaction_id,
+            feedback_score=5 if clicked_yes else 1
+        )
+        # A feedback click is activity too; a session already reaped is left ended
+        if analytics.session_id is not None:
+            get_registry().heartbeat(st.session_state.history, analytics)
+        with col1 if clicked_yes else col3:
+            st.success("Thanks for your feedback!")
+
+
+def load_older_messages():
+    """Show one more page of conversation history"""
+    st.session_state.history_pages += 1
+
+
+@st.fragment
+@profiling.profiled_fragment("chat history")
+def message_list():
+    """Conversation history, newest first, a page of turns at a time.
+
+    Only the latest `history_pages * HISTORY_PAGE_SIZE` turns are sent to the
+    browser, so a long classroom session costs the same as a short one until
+    someone asks for older messages.
+    """
+    history = st.session_state.history
+    if len(history) == 0:
+        return
+
+    st.markdown("### Our Conversation 📝")
+    # Each turn is a user message plus the answer to it
+    visible = st.session_state.history_pages * HISTORY_PAGE_SIZE * 2
+    first_shown = max(0, len(history) - visible)
+    # Message content is already the markdown to show, so there is nothing to cache
+    for message in reversed(history.messages(first_shown, len(history))):
+        if message["role"] == "user":
+            with st.chat_message("user", avatar="👤"):
+                st.markdown(message["content"])
+        else:
+            with st.chat_message("assistant", avatar="🤖"):
+                st.markdown(message["content"])
+
+    if first_shown > 0:
+        st.button("⬆️ Load older messages", key="load_older", on_click=load_older_messages)
+
+
+@st.fragment
+@profiling.profiled_fragment("chat")
+def chat_panel():
+    """Chat form plus history and feedback.
+
+    Submitting the form only reruns this fragment, so the sidebar, CSS/JS
+    injection and the other pages are not rebuilt on every message.
+    """
+    history = st.session_state.history
+    resume_session()
+    chat_container = st.container()
+    with chat_container:
+        st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+        
+        # Show active topics
+        if len(history) > 1:
+            recent_topics = set()
+            for msg in history.recent(3):
+                if msg["role"] == "user":
+                    recent_topics.add(msg["content"].lower())
+            if recent_topics:
+                st.markdown("#### 🎯 We've been talking about:")
+                for topic in recent_topics:
+                    st.markdown(f"- {topic}")
+                st.markdown("---")
+
+        # Chat interface with Enter key support
+        with st.form(key='message_form', clear_on_submit=True):
+            user_input = st.text_area("What would you like to know? 🤔", 
+                                    key='input', 
+                                    height=100,
+                                    placeholder="Type your message here...")
+            
+            # Add Enter key hint
+            st.markdown('<p class="enter-hint">💡 Tip: Press Enter to send your message, or Shift+Enter for a new line</p>', unsafe_allow_html=True)
+            
+            submit_button = st.form_submit_button("Send Message", use_container_width=True)
+
+            if submit_button and user_input:
+                with metrics.timer("schoolbot_chat_stage_seconds", stage="turn"):
+                    with metrics.timer("schoolbot_chat_stage_seconds", stage="input"):
+                        history.append("user", user_input)
+                    with metrics.timer("schoolbot_chat_stage_seconds", stage="context"):
+                        messages = history.for_model()
+                    response = get_assistant_response(messages, user_input)
+                    if response:
+                        history.append("assistant", response)
+                        metrics.inc("schoolbot_chat_turns_total")
+
+        # History and feedback are nested fragments so feedback clicks
+        # don't re-send the whole conversation to the browser
+        with metrics.timer("schoolbot_chat_stage_seconds", stage="render"):
+            message_list()
+            feedback_widget()
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    # Account for this session's memory, spilling cold history if over a cap
+    get_registry().track(history, st.session_state.analytics)
+
+
+def render():
+    """Render the Chat page"""
+    load_client()
+    init_chat_state()
+    st.markdown(ENTER_KEY_SCRIPT, unsafe_allow_html=True)
+    st.markdown('<p class="big-font">Chat with LR SchoolBot! 🤖</p>', unsafe_allow_html=True)
+    chat_panel()
@@ -0,0 +1,454 @@
+# Analytics dashboard shared by src/analytics_dashboard.py and
+# src/pages/1_Analytics_Dashboard.py. All data access goes through
+# analytics_queries, which memoizes results per date range and data version.
+
+import os
+import json
+import weakref
+import tempfile
+import importlib.util
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+import profiling
+import analytics_queries as queries
+import analytics_export
+from session_registry import get_registry
+
+# Custom CSS
+DASHBOARD_CSS = """
+    <style>
+    .header-font {
+        font-size:28px !important;
+        font-weight: bold;
+        color: #1E88E5;
+    }
+    .metric-card {
+        background-color: #f8f9fa;
+        border-radius: 10px;
+        padding: 20px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        text-align: center;
+    }
+    .metric-value {
+        font-size: 24px;
+        font-weight: bold;
+        color: #1E88E5;
+    }
+    .metric-label {
+        font-size: 14px;
+        color: #6c757d;
+    }
+    .chart-container {
+        background-color: white;
+        border-radius: 10px;
+        padding: 20px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    </style>
+    """
+
+
+# Password Protection
+def check_password():
+    """Returns `True` if the user had the correct password."""
+
+    def password_entered():
+        """Checks whether a password entered by the user is correct."""
+        if st.session_state["password"] == os.environ.get("DASHBOARD_PASSWORD", "admin"):
+            st.session_state["password_correct"] = True
+            del st.session_state["password"]  # don't store password
+        else:
+            st.session_state["password_correct"] = False
+
+    if "password_correct" not in st.session_state:
+        # First run, show input for password.
+        st.markdown('<p class="header-font">SchoolBot Analytics Dashboard</p>', unsafe_allow_html=True)
+        st.text_input(
+            "Password", type="password", on_change=password_entered, key="password"
+        )
+        return False
+    elif not st.session_state["password_correct"]:
+        # Password not correct, show input + error.
+        st.markdown('<p class="header-font">SchoolBot Analytics Dashboard</p>', unsafe_allow_html=True)
+        st.text_input(
+            "Password", type="password", on_change=password_entered, key="password"
+        )
+        st.error("😕 Password incorrect")
+        return False
+    else:
+        # Password correct.
+        return True
+
+
+def metric_card(column, value, label):
+    """Show one Key Metrics card in a column"""
+    column.markdown(
+        f"""
+        <div class="metric-card">
+            <div class="metric-value">{value}</div>
+            <div class="metric-label">{label}</div>
+        </div>
+        """, 
+        unsafe_allow_html=True
+    )
+
+
+def ensure_data_files(data_dir):
+    """Show which analytics files exist, creating empty ones if needed"""
+    sessions_file = os.path.join(data_dir, "sessions.json")
+    interactions_file = os.path.join(data_dir, "interactions.json")
+    feedback_file = os.path.join(data_dir, "feedback.json")
+
+    # Display debugging info
+    st.sidebar.markdown("### Data Files")
+    st.sidebar.write(f"Sessions file exists: {os.path.exists(sessions_file)}")
+    st.sidebar.write(f"Interactions file exists: {os.path.exists(interactions_file)}")
+    st.sidebar.write(f"Feedback file exists: {os.path.exists(feedback_file)}")
+
+    # Initialize with empty data if files don't exist
+    os.makedirs(data_dir, exist_ok=True)
+    for path in (sessions_file, interactions_file, feedback_file):
+        if not os.path.exists(path):
+            with open(path, 'w') as f:
+                json.dump([], f)
+
+
+def render_key_metrics(date_range, data_dir):
+    """Unique users, sessions, interactions and average session length"""
+    st.markdown("## 📈 Key Metrics")
+
+    metrics = queries.key_metrics(date_range, data_dir)
+    col1, col2, col3, col4 = st.columns(4)
+    if metrics['unique_users_exact']:
+        metric_card(col1, metrics['unique_users'], "Unique Users")
+    else:
+        metric_card(col1, f"≈{metrics['unique_users']:,}", "Unique Users (estimated)")
+    metric_card(col2, metrics['total_sessions'], "Total Sessions")
+    metric_card(col3, metrics['total_interactions'], "Total Interactions")
+    metric_card(col4, f"{metrics['avg_session_minutes']:.1f}", "Avg. Session (mins)")
+
+
+def render_query_analysis(date_range, data_dir):
+    """Query type pie and top topics bar chart"""
+    st.markdown("## 💬 Query Analysis")
+
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Query types distribution
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.subheader("Query Types")
+        
+        query_types = queries.query_type_distribution(date_range, data_dir)
+        if not query_types.empty:
+            fig = px.pie(query_types, values='count', names='query_type',
+                       title="Query Types Distribution")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No query type data available for the selected date range")
+            
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    with col2:
+        # Topics
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.subheader("Top Topics")
+        
+        topic_counts = queries.topic_counts(date_range, data_dir)
+        if not topic_counts.empty:
+            fig = px.bar(topic_counts.head(10), x='topic', y='count',
+                      title="Most Common Topics")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No topic data available for the selected date range")
+            
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+@st.fragment
+@profiling.profiled_fragment("dashboard response times")
+def render_response_times(date_range, data_dir):
+    """Response-time percentiles over time, overall or for one query type"""
+    st.markdown("## ⏱️ Response Times")
+
+    by_type = queries.latency_by_type(date_range, data_dir)
+    col1, col2 = st.columns(2)
+    query_type = col2.selectbox("Query type", ["All", *by_type['query_type']], key="latency_query_type")
+    # Hourly sketches cover all query types together
+    buckets = ["day", "hour"] if query_type == "All" else ["day"]
+    bucket = col1.radio("Bucket", buckets, format_func=str.title, horizontal=True, key="latency_bucket")
+
+    series = queries.latency_percentiles(
+        date_range, data_dir, bucket=bucket, query_type=None if query_type == "All" else query_type
+    )
+    if series.empty:
+        st.info("No response time data available for the selected date range")
+        return
+
+    fig = px.line(series, x='period', y=list(queries.LATENCY_QUANTILES), markers=True,
+                  labels={'period': '', 'value': 'Response time (ms)', 'variable': 'Percentile'},
+                  title="Response Time Percentiles")
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("By Query Type")
+    st.dataframe(by_type.round(0), hide_index=True)
+
+
+def render_tokens(date_range, data_dir):
+    """Token use per turn, cost per session and how prompt size affects response time"""
+    st.markdown("## 🪙 Tokens & Cost")
+
+    usage = queries.token_usage(date_range, data_dir)
+    if not usage['interactions']:
+        st.info("No token data available for the selected date range")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    metric_card(col1, f"{usage['total_tokens']:,}", "Total Tokens")
+    metric_card(col2, f"${usage['cost']:,.2f}", "Estimated Cost")
+    metric_card(col3, f"${usage['cost'] / usage['sessions']:.4f}", "Avg. Cost per Session")
+    metric_card(col4, f"{usage['cached_share']:.0%}", "Cached Prompt Tokens")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.subheader("Tokens per Turn")
+        by_turn = queries.tokens_by_turn(date_range, data_dir)
+        fig = px.line(by_turn, x='turn', y=['prompt_tokens', 'completion_tokens'], markers=True,
+                      labels={'turn': 'Turn in session', 'value': 'Mean tokens', 'variable': ''},
+                      title="Prompt Growth over a Conversation")
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with col2:
+        st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+        st.subheader("Cost per Session")
+        costs = queries.session_costs(date_range, data_dir)
+        fig = px.histogram(costs, x='cost', nbins=40,
+                           labels={'cost': 'Estimated cost (USD)'}, title="Session Cost Distribution")
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    st.subheader("Response Time by Prompt Size")
+    by_size = queries.latency_by_prompt_size(date_range, data_dir)
+    fig = px.bar(by_size, x='prompt_tokens', y=['p50', 'p90'], barmode='group',
+                 labels={'prompt_tokens': 'Prompt tokens', 'value': 'Response time (ms)', 'variable': ''},
+                 title="Where Context Length Slows Answers")
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("Most Expensive Sessions")
+    st.dataframe(costs.head(10), hide_index=True)
+
+
+def render_feedback(date_range, data_dir):
+    """Positive vs negative feedback pie"""
+    st.markdown("## 👍 User Feedback")
+
+    # Feedback distribution
+    st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+    st.subheader("Feedback Ratings")
+    
+    feedback_counts = queries.feedback_distribution(date_range, data_dir)
+    if not feedback_counts.empty:
+        fig = px.pie(feedback_counts, values='count', names='rating',
+                  title="User Feedback Distribution",
+                  color_discrete_map={'👍 Positive': '#4CAF50', '👎 Negative': '#F44336'})
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("No feedback data available for the selected date range")
+        
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
+@st.fragment
+@profiling.profiled_fragment("dashboard raw data")
+def raw_data_table(table, date_range, data_dir):
+    """Paginated view of one raw table; only the visible page is sent to the browser"""
+    all_columns, default_columns = queries.raw_columns(table, data_dir)
+    id_columns = " or ".join(queries.RAW_TABLES[table])
+
+    col1, col2 = st.columns([3, 1])
+    columns = col1.multiselect("Columns", all_columns, default=default_columns,
+                               key=f"raw_{table}_columns")
+    search = col2.text_input(f"Search by {id_columns}", key=f"raw_{table}_search")
+
+    col1, col2 = st.columns([1, 3])
+    page_size = col1.selectbox("Rows per page", queries.PAGE_SIZES, key=f"raw_{table}_page_size")
+    matches = queries.search_raw(table, date_range, data_dir, search)
+    total = len(matches)
+    pages = max(1, -(-total // page_size))
+    # A narrower search or bigger page size can leave the old page out of range
+    page_key = f"raw_{table}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = col2.number_input("Page", min_value=1, max_value=pages, key=page_key)
+
+    if not total:
+        st.info(f"No {table} match" if search else f"No {table[:-1]} data available")
+        return
+    rows = queries.page_slice(matches, columns, page, page_size, data_dir)
+    first_row = (page - 1) * page_size + 1
+    st.caption(f"Rows {first_row:,}-{first_row + len(rows) - 1:,} of {total:,} (page {page} of {pages})")
+    st.dataframe(rows)
+
+
+def render_raw_data(date_range, data_dir):
+    """Sessions and interactions in the selected range, a page at a time"""
+    st.markdown("## 🔬 Raw Data")
+
+    # Sessions data
+    st.subheader("Sessions")
+    raw_data_table("sessions", date_range, data_dir)
+
+    # Interactions data
+    st.subheader("Interactions")
+    raw_data_table("interactions", date_range, data_dir)
+
+
+def remove_file(path):
+    """Delete a finished or abandoned export file, if it is still there"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExportFile:
+    """
+    A prepared export waiting to be downloaded. The file is deleted once
+    the download is served, when a newer export replaces it, when Streamlit
+    discards the session holding it, or at the latest when the process exits.
+    """
+
+    def __init__(self, path, file_name, rows):
+        """Take ownership of the file at `path`"""
+        self.path = path
+        self.file_name = file_name
+        self.rows = rows
+        self._remove = weakref.finalize(self, remove_file, path)
+
+    def remove(self):
+        """Delete the file now"""
+        self._remove()
+
+
+def downloaded():
+    """Drop the session's export once the browser has been sent it"""
+    export = st.session_state.pop("export_file", None)
+    if export:
+        export.remove()
+
+
+@st.fragment
+@profiling.profiled_fragment("dashboard export")
+def render_export(date_range, data_dir):
+    """Write the selected range to a file in chunks and offer it for download"""
+    st.markdown("## 📤 Export")
+
+    formats = [fmt for fmt in analytics_export.FORMATS
+               if fmt != "parquet" or importlib.util.find_spec("pyarrow")]
+    col1, col2, col3 = st.columns([1, 3, 1])
+    table = col1.selectbox("Table", list(analytics_export.TABLES), key="export_table")
+    all_columns = list(analytics_export.TABLES[table][1])
+    columns = col2.multiselect("Columns", all_columns, default=all_columns, key=f"export_{table}_columns")
+    fmt = col3.selectbox("Format", formats, key="export_format")
+
+    start_date, end_date = date_range
+    st.caption(
+        "Large histories are better exported from the command line: "
+        f"`python src/analytics_export.py {table} {table}.{fmt} "
+        f"--start {start_date} --end {end_date}`"
+    )
+
+    if st.button("Prepare export", key="export_prepare"):
+        # Only the latest export of a session is kept
+        previous = st.session_state.pop("export_file", None)
+        if previous:
+            previous.remove()
+
+        # A file of its own, so admins exporting the same range don't overwrite each other.
+        # Written chunk by chunk, so only the finished file is ever held whole
+        fd, path = tempfile.mkstemp(prefix=f"schoolbot_{table}_", suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            with st.spinner("Exporting..."):
+                rows = analytics_export.export(table, path, data_dir, start_date, end_date, columns, fmt)
+        except Exception:
+            remove_file(path)
+            raise
+        st.session_state["export_file"] = ExportFile(path, f"schoolbot_{table}_{start_date}_{end_date}.{fmt}", rows)
+
+    export = st.session_state.get("export_file")
+    if export and os.path.exists(export.path):
+        # The button keeps its own copy of the data, so the file can go as soon as it is clicked
+        with open(export.path, 'rb') as f:
+            st.download_button(
+                f"Download {export.file_name} ({export.rows:,} rows)", f,
+                file_name=export.file_name,
+                mime=analytics_export.MIME_TYPES[os.path.splitext(export.path)[1].lstrip(".")],
+                key="export_download",
+                on_click=downloaded,
+            )
+
+
+def render_session_memory():
+    """Admin view of live chat sessions in this process"""
+    st.markdown("## 🧠 Session Memory")
+
+    memory_usage = get_registry().usage()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Live Sessions", len(memory_usage))
+    col2.metric("Total In Memory (KB)", f"{sum(row['bytes'] for row in memory_usage) / 1024:.1f}")
+    col3.metric("Per-Session Cap (KB)", f"{get_registry().session_cap / 1024:.0f}")
+
+    if memory_usage:
+        memory_df = pd.DataFrame(memory_usage).head(20)
+        memory_df['kb'] = (memory_df['bytes'] / 1024).round(1)
+        memory_df['last_seen'] = pd.to_datetime(memory_df['last_seen'], unit='s')
+        st.dataframe(memory_df[['session_id', 'kb', 'messages', 'spilled_messages', 'last_seen']])
+    else:
+        st.info("No live chat sessions")
+
+
+def render(data_dir=queries.DATA_DIR):
+    """Render the whole dashboard; call after st.set_page_config"""
+    st.markdown(DASHBOARD_CSS, unsafe_allow_html=True)
+
+    if not check_password():
+        st.stop()  # Do not continue if check_password is not True.
+
+    ensure_data_files(data_dir)
+
+    # Dashboard
+    st.markdown('<p class="header-font">SchoolBot Analytics Dashboard</p>', unsafe_allow_html=True)
+
+    # Date range filter
+    st.sidebar.header("Filters")
+    try:
+        min_date, max_date = queries.date_bounds(data_dir)
+    except Exception as e:
+        st.error(f"Error loading data: {e}")
+        st.stop()
+
+    start_date = st.sidebar.date_input("Start Date", min_date)
+    end_date = st.sidebar.date_input("End Date", max_date)
+
+    if start_date > end_date:
+        st.sidebar.error("End date must be after start date")
+        st.stop()
+    date_range = (start_date, end_date)
+
+    render_key_metrics(date_range, data_dir)
+    render_query_analysis(date_range, data_dir)
+    render_response_times(date_range, data_dir)
+    render_tokens(date_range, data_dir)
+    render_feedback(date_range, data_dir)
+    render_raw_data(date_range, data_dir)
+    render_export(date_range, data_dir)
+    render_session_memory()
+
+    # Footer
+    st.markdown("---")
+    st.markdown("*SchoolBot Analytics Dashboard* 📊")
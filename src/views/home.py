@@ -0,0 +1,75 @@
+# Fair Use Notice: This educational project uses concepts from academic sources
+# under Fair Use (17 U.S.C. § 107) for nonprofit educational purposes.
+# Full details: https://github.com/Noah-Banjo/lr-schoolbot/blob/main/README.md
+#
+# Home page: static welcome content, no OpenAI or analytics
+
+from views.static import content_version, render_static
+
+# Page content, in order; the two school cards sit side by side in one
+# flex row instead of two st.columns
+SECTIONS = [
+    '<p class="big-font">Welcome to LR SchoolBot! 🎉</p>',
+
+    "### Your friendly guide to Little Rock's amazing school history! 🌟",
+
+    """
+    Hey there! 👋 I'm your friendly neighborhood SchoolBot, and I'm super excited to take you 
+    on an amazing journey through the history of two incredible schools based on real academic research!
+    """,
+
+    """
+    <div style="display: flex; flex-wrap: wrap; gap: 1rem;">
+    <div class="school-card" style="flex: 1 1 280px;">
+    <h3>🏛️ Central High School</h3>
+    <ul>
+    <li>Historic landmark</li>
+    <li>Symbol of civil rights</li>
+    <li>Amazing architecture</li>
+    <li>1957 integration story</li>
+    </ul>
+    </div>
+    <div class="school-card" style="flex: 1 1 280px;">
+    <h3>🎓 Dunbar High School</h3>
+    <ul>
+    <li>Educational excellence</li>
+    <li>Rich community heritage</li>
+    <li>Inspiring legacy</li>
+    <li>Remarkable achievements</li>
+    </ul>
+    </div>
+    </div>
+    """,
+
+    "### 🌟 Let's Explore Together!",
+
+    """
+    Here's what you can do:
+    1. 💬 **Chat with me** - Ask any questions about the schools
+    2. 🗺️ **Find the schools** - See where these amazing places are
+    3. 📚 **Learn cool facts** - Discover fascinating stories from real historical sources
+    4. 🎨 **Share with friends** - Tell others what you learn
+    """,
+
+    "### ✨ Fun Fact of the Day",
+
+    """
+    <div style="background-color: #FFF4DE; color: #664500; padding: 20px; border-radius: 10px; border-left: 5px solid #FFA500;">
+    <strong>Did you know?</strong> Central High School's building is so special, it's a National Historic Site! That means it's as important as the Statue of Liberty! 🗽
+    </div>
+    """,
+
+    # Educational disclaimer
+    """
+    <div class="copyright-notice">
+    <strong>📚 Educational Notice:</strong> This tool is based on scholarly research for educational purposes. 
+    For comprehensive study, please consult the original academic sources and visit local archives.
+    </div>
+    """,
+]
+VERSION = content_version(SECTIONS)
+
+
+def render():
+    """Render the Home page"""
+    render_static("home", SECTIONS, VERSION)
@@ -0,0 +1,113 @@
+# Fair Use Notice: This educational project uses concepts from academic sources
+# under Fair Use (17 U.S.C. § 107) for nonprofit educational purposes.
+# Full details: https://github.com/Noah-Banjo/lr-schoolbot/blob/main/README.md
+#
+# School Locations page: folium map and visitor information
+
+import streamlit as st
+import folium
+from streamlit_folium import folium_static
+
+
+def create_school_map():
+    """Create a map with both schools marked"""
+    m = folium.Map(location=[34.7370, -92.2986], zoom_start=13)
+    
+    # Add Central High School marker
+    central_popup = """
+    <b>Little Rock Central High School</b><br>
+    1500 S Park St, Little Rock, AR 72202<br>
+    <br>
+    🏛️ National Historic Site<br>
+    🕒 Visitor Center Hours: 9 AM - 4:30 PM<br>
+    📞 Phone: (501) 374-1957<br>
+    <br>
+    <a href="https://www.nps.gov/chsc/" target="_blank">Visit Website</a>
+    """
+    
+    folium.Marker(
+        [34.7367, -92.2980],
+        popup=central_popup,
+        tooltip="Central High School",
+        icon=folium.Icon(color='red', icon='info-sign')
+    ).add_to(m)
+    
+    # Add Dunbar High School marker
+    dunbar_popup = """
+    <b>Historic Dunbar High School</b><br>
+    (Now Dunbar Magnet Middle School)<br>
+    1100 Wright Ave, Little Rock, AR 72202<br>
+    <br>
+    🏫 Historic Site<br>
+    📚 Part of Little Rock's African American Heritage Trail<br>
+    🎓 Historic Landmark
+    """
+    
+    folium.Marker(
+        [34.7399, -92.2867],
+        popup=dunbar_popup,
+        tooltip="Historic Dunbar High School",
+        icon=folium.Icon(color='blue', icon='info-sign')
+    ).add_to(m)
+    
+    return m
+
+
+def render():
+    """Render the School Locations page"""
+    st.markdown('<p class="big-font">Find the Historic Schools! 🗺️</p>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    ### 📍 Explore These Historic Locations
+    Want to visit these amazing schools? Here's where you can find them! The map below shows both 
+    Central High School and the historic Dunbar High School building.
+    """)
+    
+    # Display map in container
+    with st.container():
+        st.markdown('<div class="map-container">', unsafe_allow_html=True)
+        map_obj = create_school_map()
+        folium_static(map_obj)
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Visitor information
+    st.markdown("""
+    <div class="visitor-info">
+    <h3>📸 Planning Your Visit</h3>
+    
+    <h4>Central High School National Historic Site</h4>
+    <ul>
+    <li>🏛️ Still an active high school</li>
+    <li>🎟️ Free admission to visitor center</li>
+    <li>🚶‍♂️ Guided tours available (reservation required)</li>
+    <li>📚 Museum exhibits and educational programs</li>
+    <li>🖼️ Historic photographs and artifacts</li>
+    </ul>
+    
+    <h4>Historic Dunbar High School</h4>
+    <ul>
+    <li>🏫 Now Dunbar Magnet Middle School</li>
+    <li>🗺️ Part of the Little Rock African American Heritage Trail</li>
+    <li>📝 Historical markers on site</li>
+    <li>🎨 Cultural significance in the community</li>
+    <li>🌟 Architectural landmark</li>
+    </ul>
+    
+    <h3>🚗 Getting There</h3>
+    <ul>
+    <li>Both sites are easily accessible by car</li>
+    <li>Public parking available</li>
+    <li>Located in historic Little Rock neighborhoods</li>
+    <li>Can be visited in the same day</li>
+    </ul>
+    
+    <h3>📸 Tips for Visitors</h3>
+    <ol>
+    <li>Check visitor center hours before going</li>
+    <li>Respect active school zones during school hours</li>
+    <li>Photography allowed outside buildings</li>
+    <li>Join guided tours when available</li>
+    <li>Visit during good weather for best experience</li>
+    </ol>
+    </div>
+    """, unsafe_allow_html=True)
@@ -0,0 +1,110 @@
+# Fair Use Notice: This educational project uses concepts from academic sources
+# under Fair Use (17 U.S.C. § 107) for nonprofit educational purposes.
+# Full details: https://github.com/Noah-Banjo/lr-schoolbot/blob/main/README.md
+#
+# Sources page: static citations and fair use statement, no OpenAI or analytics
+
+from views.static import content_version, render_static
+
+# Page content, in order; each entry was once its own st.markdown call
+SECTIONS = [
+    '<p class="big-font">Our Historical Sources 📚</p>',
+
+    """
+    ### 📖 Building Knowledge from Trusted Academic Sources
+    
+    My knowledge comes from these carefully selected scholarly works that provide authentic 
+    insights into both schools' histories:
+    """,
+
+    """
+    <div class="source-card">
+    <h4>1. Jones-Wilson's "A Traditional Model of Educational Excellence: Dunbar High School"</h4>
+    <strong>Published:</strong> 1981<br>
+    <strong>Focus:</strong> Dunbar's educational legacy and community impact<br>
+    <strong>Key aspects:</strong> Teaching methods, academic achievements, community influence<br>
+    <strong>Publication:</strong> <em>The Journal of Negro Education</em>, 50(3), 331-345<br>
+    <br>
+    <em>This scholarly article provides detailed analysis of Dunbar High School's role as a model 
+    of educational excellence, documenting the school's innovative teaching methods and significant 
+    impact on the African American community in Little Rock.</em>
+    </div>
+    
+    <div class="source-card">
+    <h4>2. Elizabeth Huckaby's "Crisis at Central High: Little Rock, 1957-58"</h4>
+    <strong>Published:</strong> 1980<br>
+    <strong>Focus:</strong> Firsthand account of Central High School integration<br>
+    <strong>Key aspects:</strong> Administrative perspective, daily challenges, student experiences<br>
+    <strong>Publisher:</strong> Louisiana State University Press<br>
+    <br>
+    <em>Written by the vice principal for girls at Central High School during the integration 
+    crisis, this memoir is based on detailed diaries kept during the 1957-58 school year. 
+    It provides unique insights into the administrative challenges and human experiences 
+    during this pivotal moment in civil rights history.</em>
+    </div>
+    """,
+
+    """
+    ### 🏫 Why These Sources Matter
+    
+    Both sources represent important contributions to the historical record:
+    
+    **Academic Rigor:**
+    - Jones-Wilson's work appeared in a peer-reviewed academic journal
+    - Huckaby's memoir is based on contemporary diary entries, making it a valuable primary source
+    - Both were published within a few years of each other (1980-1981), representing scholarly work from that era
+    
+    **Complementary Perspectives:**
+    - **Educational Excellence:** Jones-Wilson focuses on Dunbar's pedagogical innovations and community impact
+    - **Civil Rights History:** Huckaby provides an administrative viewpoint during a crucial moment in integration
+    - **Community Impact:** Both sources highlight how these schools shaped Little Rock's educational landscape
+    
+    ### ⚖️ Fair Use Statement
+    
+    This educational project uses these academic sources under Fair Use (17 U.S.C. § 107) for nonprofit educational purposes. The project:
+    - Creates transformative educational content
+    - Uses limited concepts and factual information
+    - Maintains proper academic attribution
+    - Encourages engagement with original scholarship
+    - Operates for nonprofit educational research
+    
+    ### 📚 Further Research
+    
+    While these sources provide valuable insights, there's much more to discover about Little Rock's 
+    educational heritage! For comprehensive research, I recommend visiting:
+    
+    - **Butler Center for Arkansas Studies** - Little Rock Central Library
+    - **UALR Center for Arkansas History and Culture**
+    - **Central High Museum and Visitor Center**
+    - **Arkansas State Archives**
+    - **Little Rock School District Archives**
+    
+    ### 🔍 About This Project
+    
+    This SchoolBot demonstrates how AI can responsibly work with verified academic sources to make 
+    historical research more accessible and engaging. It's part of ongoing research into AI applications 
+    for digital archives and educational outreach, showing how technology can help preserve and share 
+    community heritage while maintaining scholarly standards.
+    
+    ### 📖 Complete Citations
+    
+    **Academic Sources:**
+    
+    Jones-Wilson, F. C. (1981). A Traditional Model of Educational Excellence: Dunbar High School. 
+    *The Journal of Negro Education*, 50(3), 331-345.
+    
+    Huckaby, E. P. (1980). *Crisis at Central High: Little Rock, 1957-58*. 
+    Baton Rouge: Louisiana State University Press.
+    
+    ### 📧 Questions About Sources?
+    
+    For questions about the use of these academic sources or this educational project, please contact 
+    the research team or consult the full Fair Use documentation in our README.
+    """,
+]
+VERSION = content_version(SECTIONS)
+
+
+def render():
+    """Render the Sources page"""
+    render_static("sources", SECTIONS, VERSION)
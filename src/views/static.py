@@ -0,0 +1,33 @@
+# Compiled HTML cache for the static pages (Home, About, Sources)
+
+import hashlib
+import textwrap
+import streamlit as st
+
+# (page name, content version) -> compiled page, shared by every session
+_compiled = {}
+
+
+def content_version(sections):
+    """Short hash of a page's sections, so edited content gets a new cache entry"""
+    digest = hashlib.sha256()
+    for section in sections:
+        digest.update(section.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def compile_page(sections):
+    """Join a page's markdown/HTML sections into one fragment.
+
+    Sections are dedented one at a time and separated by blank lines, which
+    is how each of them was rendered as its own st.markdown call.
+    """
+    return "\n\n".join(textwrap.dedent(section).strip() for section in sections)
+
+
+def render_static(name, sections, version):
+    """Send a static page to the browser as a single markdown element"""
+    key = (name, version)
+    if key not in _compiled:
+        _compiled[key] = compile_page(sections)
+    st.markdown(_compiled[key], unsafe_allow_html=True)
@@ -0,0 +1,27 @@
+"""analytics_loader's cached frames after the analytics files change"""
+import json
+import os
+
+from analytics_loader import load_frames
+from analytics_wal import apply_ops
+
+
+def test_same_length_rewrite_is_reloaded(tmp_path):
+    data_dir = str(tmp_path)
+    interactions = [{"interaction_id": f"i{i}", "session_id": "s1", "timestamp": "2025-03-03T09:01:00",
+                     "query_type": "question", "response_time_ms": 800, "feedback_score": 5}
+                    for i in range(3)]
+    path = os.path.join(data_dir, "interactions.json")
+    with open(path, 'w') as f:
+        json.dump(interactions, f)
+    assert load_frames(data_dir)[1]["feedback_score"].tolist() == [5, 5, 5]
+
+    # Re-rating 5 as 1 keeps the size; put the mtime back too, as a coarse clock would
+    before = os.stat(path)
+    apply_ops(data_dir, [{"op": "feedback", "record": {"interaction_id": "i1", "session_id": "s1",
+                                                       "timestamp": "2025-03-03T09:02:00",
+                                                       "feedback_score": 1}}])
+    os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+    assert os.path.getsize(path) == before.st_size
+
+    assert load_frames(data_dir)[1]["feedback_score"].tolist() == [5, 1, 5]
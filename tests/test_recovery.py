@@ -0,0 +1,110 @@
+"""recover() on data directories left behind by crashes and failed checkpoints"""
+import json
+import os
+
+from analytics_blobs import get_store
+from analytics_loader import GENERATIONS_FILE
+from analytics_wal import CHECKPOINT_FILE, WAL_FILE, recover
+
+
+def session(session_id):
+    return {"session_id": session_id, "user_id": "u1", "start_time": "2025-03-03T09:00:00",
+            "end_time": None, "duration_seconds": 0, "interaction_count": 0,
+            "device_type": "unknown", "browser": "unknown", "is_return_user": False}
+
+
+def interaction(interaction_id, response="Rosa Parks was arrested in 1955."):
+    return {"interaction_id": interaction_id, "session_id": "s1", "timestamp": "2025-03-03T09:01:00",
+            "query": "Who was Rosa Parks?", "query_type": "question", "response": response,
+            "response_time_ms": 800, "sentiment_score": 0.0, "topics": ["civil rights"],
+            "feedback_score": None, "turn": 1, "model": "gpt-3.5-turbo", "prompt_tokens": None,
+            "completion_tokens": None, "total_tokens": None, "cached_tokens": None}
+
+
+def write_data(data_dir, sessions=(), interactions=(), feedback=()):
+    for name, records in (("sessions.json", sessions), ("interactions.json", interactions),
+                          ("feedback.json", feedback)):
+        with open(data_dir / name, 'w') as f:
+            json.dump(list(records), f)
+
+
+def write_log(path, ops, tail=""):
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(op) + "\n" for op in ops)
+        f.write(tail)
+
+
+def read(data_dir, name):
+    with open(data_dir / name) as f:
+        return json.load(f)
+
+
+def test_torn_log_tail_is_cut_off(tmp_path):
+    write_data(tmp_path)
+    write_log(tmp_path / WAL_FILE, [{"op": "session_start", "record": session("s1")}],
+              tail='{"op": "session_start", "record": {"session_id": "s2", "user_')
+
+    assert recover(str(tmp_path)) == {"repaired": [], "replayed": 1}
+    assert [record["session_id"] for record in read(tmp_path, "sessions.json")] == ["s1"]
+    assert not os.path.exists(tmp_path / WAL_FILE)
+
+
+def test_corrupt_data_file_is_salvaged(tmp_path):
+    write_data(tmp_path, sessions=[session("s1")])
+    damaged = json.dumps([session("s1"), session("s2"), session("s3")])
+    damaged = damaged[:damaged.index('"s3"') + 10]
+    with open(tmp_path / "sessions.json", 'w') as f:
+        f.write(damaged)
+
+    assert recover(str(tmp_path))["repaired"] == ["sessions.json"]
+    assert [record["session_id"] for record in read(tmp_path, "sessions.json")] == ["s1", "s2"]
+    with open(tmp_path / "sessions.json.corrupt") as f:
+        assert f.read() == damaged
+
+
+def test_partial_checkpoint_is_replayed_once(tmp_path):
+    # The failed checkpoint had already renamed sessions.json into place, but not interactions.json
+    write_data(tmp_path, sessions=[session("s1")])
+    write_log(tmp_path / CHECKPOINT_FILE, [{"op": "session_start", "record": session("s1")},
+                                           {"op": "interaction", "record": interaction("i1")}])
+    write_log(tmp_path / WAL_FILE, [{"op": "interaction", "record": interaction("i2", "Montgomery")}])
+
+    assert recover(str(tmp_path)) == {"repaired": [], "replayed": 3}
+    assert [record["session_id"] for record in read(tmp_path, "sessions.json")] == ["s1"]
+    interactions = read(tmp_path, "interactions.json")
+    assert [record["interaction_id"] for record in interactions] == ["i1", "i2"]
+    assert "response" not in interactions[0]
+    texts = get_store(str(tmp_path)).get_many(record["response_hash"] for record in interactions)
+    assert [texts[record["response_hash"]] for record in interactions] == \
+        ["Rosa Parks was arrested in 1955.", "Montgomery"]
+    assert not os.path.exists(tmp_path / CHECKPOINT_FILE)
+    assert not os.path.exists(tmp_path / WAL_FILE)
+
+
+def test_in_place_updates_are_replayed(tmp_path):
+    stored = {key: value for key, value in interaction("i1").items() if key != "response"}
+    write_data(tmp_path, sessions=[session("s1"), session("s2")], interactions=[stored])
+    feedback = {"interaction_id": "i1", "session_id": "s1", "timestamp": "2025-03-03T09:02:00",
+                "feedback_score": 5}
+    ops = [{"op": "session_end", "record": {"session_id": "s1", "end_time": "2025-03-03T09:10:00",
+                                             "duration_seconds": 600.0, "interaction_count": 1}},
+           {"op": "feedback", "record": feedback}]
+    write_log(tmp_path / WAL_FILE, ops)
+
+    assert recover(str(tmp_path))["replayed"] == 2
+    sessions = read(tmp_path, "sessions.json")
+    assert sessions[0]["end_time"] == "2025-03-03T09:10:00"
+    assert sessions[0]["duration_seconds"] == 600.0
+    assert sessions[1] == session("s2")
+    assert read(tmp_path, "interactions.json")[0]["feedback_score"] == 5
+    assert read(tmp_path, "feedback.json") == [feedback]
+
+    # A crash before the log was removed replays it again without a second feedback record
+    write_log(tmp_path / WAL_FILE, ops)
+    recover(str(tmp_path))
+    assert read(tmp_path, "feedback.json") == [feedback]
+    assert read(tmp_path, "interactions.json")[0]["feedback_score"] == 5
+
+    # Every rewrite has finished, so readers may cache the files again
+    generations = read(tmp_path, GENERATIONS_FILE)
+    assert all(generation % 2 == 0 for generation in generations.values())
@@ -0,0 +1,59 @@
+"""Dashboard metrics on data written before the daily rollups existed"""
+import datetime
+import json
+import os
+
+import analytics_queries as queries
+from analytics_rollups import ROLLUPS_FILE, ROLLUPS_VERSION
+from analytics_wal import recover
+
+DAY = datetime.date(2025, 3, 3)
+
+
+def write_legacy_data(data_dir):
+    """Sessions and interactions as the app stored them before rollups.json, responses inline"""
+    sessions = [
+        {"session_id": f"s{i}", "user_id": f"u{i}", "start_time": f"2025-03-03T09:0{i}:00",
+         "end_time": f"2025-03-03T09:1{i}:00", "duration_seconds": 600.0, "interaction_count": 1,
+         "device_type": "unknown", "browser": "unknown", "is_return_user": False}
+        for i in range(3)
+    ]
+    interactions = [
+        {"interaction_id": f"i{i}", "session_id": f"s{i}", "timestamp": f"2025-03-03T09:0{i}:30",
+         "query": "Who was Rosa Parks?", "query_type": "question", "response": "A civil rights activist.",
+         "response_time_ms": 800, "sentiment_score": 0.0, "topics": ["civil rights"],
+         "feedback_score": 5 if i else 1}
+        for i in range(3)
+    ]
+    for name, records in (("sessions.json", sessions), ("interactions.json", interactions),
+                          ("feedback.json", [])):
+        with open(os.path.join(data_dir, name), 'w') as f:
+            json.dump(records, f)
+
+
+def assert_metrics(data_dir):
+    metrics = queries.key_metrics((DAY, DAY), data_dir)
+    assert metrics["unique_users"] == 3
+    assert metrics["total_sessions"] == 3
+    assert metrics["total_interactions"] == 3
+    assert metrics["avg_session_minutes"] == 10.0
+    assert queries.query_type_distribution((DAY, DAY), data_dir).to_dict('records') == \
+        [{"query_type": "question", "count": 3}]
+    assert dict(queries.feedback_distribution((DAY, DAY), data_dir).values.tolist()) == \
+        {queries.FEEDBACK_LABELS["positive"]: 2, queries.FEEDBACK_LABELS["negative"]: 1}
+    assert queries.latency_by_type((DAY, DAY), data_dir)["count"].tolist() == [3]
+
+
+def test_metrics_without_rollups_file(tmp_path):
+    # A dashboard reading a directory no writer has recovered yet
+    write_legacy_data(tmp_path)
+    assert_metrics(str(tmp_path))
+    assert not os.path.exists(tmp_path / ROLLUPS_FILE)
+
+
+def test_recover_backfills_rollups(tmp_path):
+    write_legacy_data(tmp_path)
+    recover(str(tmp_path))
+    with open(tmp_path / ROLLUPS_FILE) as f:
+        assert json.load(f)["version"] == ROLLUPS_VERSION
+    assert_metrics(str(tmp_path))